@@ -0,0 +1,5 @@
+import sys
+
+from course_ops.cli import main
+
+sys.exit(main())
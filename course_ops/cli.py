@@ -0,0 +1,69 @@
+import importlib
+import sys
+
+'''
+Single entry point for the course-ops tooling.
+
+Each subcommand is only imported when it is invoked, so running a
+notification step never pays for the docker build machinery (and vice versa).
+Every target module exposes a `cli(argv, prog)` function that owns its own
+argument parsing.
+'''
+
+COMMANDS = {
+    "build-context": (
+        "docker_updates.build_context",
+        "Generate or check .dockerignore files limited to what each Dockerfile uses",
+    ),
+    "build-dockers": (
+        "docker_updates.build_dockers",
+        "Build the docker images affected by a set of changed files",
+    ),
+    "build-history": (
+        "docker_updates.build_history",
+        "Report build time/size regressions and intermittently failing images",
+    ),
+    "create-fallback": (
+        "course_updates.create_fallback",
+        "Write a fallback output file when a step produced no valid output",
+    ),
+    "run-pipeline": (
+        "docker_updates.pipeline",
+        "Build the changed docker images and notify Discord in one process",
+    ),
+    "send-notification": (
+        "course_updates.send_course_notification",
+        "Send a Canvas or Docker notification to Discord",
+    ),
+}
+
+
+def print_usage(file=sys.stdout):
+    print("usage: course-ops <command> [args...]\n", file=file)
+    print("commands:", file=file)
+    width = max(len(name) for name in COMMANDS)
+    for name, (_, help_text) in COMMANDS.items():
+        print(f"  {name:<{width}}  {help_text}", file=file)
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+
+    if not argv or argv[0] in ("-h", "--help"):
+        print_usage()
+        return 0 if argv else 2
+
+    command, *rest = argv
+    if command not in COMMANDS:
+        print(f"course-ops: unknown command '{command}'\n", file=sys.stderr)
+        print_usage(file=sys.stderr)
+        return 2
+
+    module_name, _ = COMMANDS[command]
+    module = importlib.import_module(module_name)
+    module.cli(rest, prog=f"course-ops {command}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import gzip
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+'''
+Compact index of the content deployed by the previous mdxcanvas run.
+
+mdxcanvas reports every item it deploys, including the ones that did not
+change. The index keeps one line per item, (type, name, fingerprint), where
+the fingerprint is a short hash of the item's link and content hash (when
+mdxcanvas reports one), so the next run can report only what was added,
+changed or removed.
+
+An item is only counted as unchanged when its content hash is known and
+matches. Items reported without one (`[type, name, link]`, the current
+mdxcanvas output) may have been edited in place, so when they were deployed
+before they are counted as redeployed.
+
+The index is a gzipped file of JSON lines, sorted by type and name. Diffing
+is a single dictionary lookup per deployed item.
+'''
+
+INDEX_HEADER = {"format": "course-ops canvas index", "version": 1}
+
+
+@dataclass
+class DeploymentDelta:
+    added: list[list] = field(default_factory=list)
+    changed: list[list] = field(default_factory=list)
+    removed: list[list] = field(default_factory=list)
+    # Deployed before, but without a content hash to tell whether they changed
+    redeployed: int = 0
+    unchanged: int = 0
+
+    def output(self) -> dict:
+        return {
+            "added": self.added,
+            "changed": self.changed,
+            "removed": self.removed,
+            "redeployed": self.redeployed,
+            "unchanged": self.unchanged,
+        }
+
+
+def fingerprint(item: list) -> str:
+    """
+    Hashes everything mdxcanvas reports about an item besides its type and
+    name (the link, and the content hash when available).
+    """
+    return hashlib.blake2b(json.dumps(item[2:]).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def has_content_hash(item: list) -> bool:
+    return len(item) > 3 and item[3] is not None
+
+
+def load_index(index_path: str) -> dict[tuple[str, str], str] | None:
+    """
+    Reads the index of the previous deployment.
+
+    :return: Mapping of (type, name) to fingerprint, or None if there is no index
+    """
+    if not os.path.exists(index_path):
+        return None
+
+    index = {}
+    with gzip.open(index_path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline() or 'null')
+        if header != INDEX_HEADER:
+            print(f"Ignoring {index_path}: not a canvas index of this version")
+            return None
+
+        for line in f:
+            rtype, name, item_fingerprint = json.loads(line)
+            index[(rtype, name)] = item_fingerprint
+    return index
+
+
+def save_index(index_path: str, deployed_content: list[list]):
+    """
+    Writes the index of a deployment, replacing the previous one.
+    """
+    items = {(item[0], item[1]): fingerprint(item) for item in deployed_content}
+
+    path = Path(index_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(path.name + '.tmp')
+    with gzip.open(temporary, 'wt', encoding='utf-8', compresslevel=6) as f:
+        f.write(json.dumps(INDEX_HEADER) + '\n')
+        for (rtype, name), item_fingerprint in sorted(items.items()):
+            f.write(json.dumps([rtype, name, item_fingerprint]) + '\n')
+    os.replace(temporary, path)
+
+
+def diff_deployment(previous: dict[tuple[str, str], str] | None, deployed_content: list[list]) -> DeploymentDelta:
+    """
+    Compares a deployment with the index of the previous one. Without a
+    previous index every item is reported as added.
+
+    :param previous: The previous index (see load_index)
+    :param deployed_content: The `deployed_content` of the mdxcanvas output
+    """
+    previous = previous or {}
+    delta = DeploymentDelta()
+
+    seen = set()
+    for item in deployed_content:
+        key = (item[0], item[1])
+        if key in seen:
+            continue
+        seen.add(key)
+
+        old = previous.get(key)
+        if old is None:
+            delta.added.append(item)
+        elif old != fingerprint(item):
+            delta.changed.append(item)
+        elif not has_content_hash(item):
+            delta.redeployed += 1
+        else:
+            delta.unchanged += 1
+
+    delta.removed = [[rtype, name, None] for rtype, name in sorted(previous.keys() - seen)]
+    return delta
@@ -1,5 +1,5 @@
 from datetime import datetime
-from send_course_notification import Field, space, generate_field, truncate_error_message
+from course_updates.send_course_notification import Field, space, generate_field, truncate_error_message
 
 '''
 Example payload (mdxcanvas -v 0.3.27):
@@ -25,6 +25,19 @@ Example payload (mdxcanvas -v 0.3.27):
     ],
     "error": ""
 }
+
+Optional key added by send-notification when a deployment index is used
+(only the items that differ from the previous deployment):
+
+{
+    "deployed_delta": {
+        "added": [["page", "New Page", "https://..."]],
+        "changed": [["assignment", "HW 1", "https://..."]],
+        "removed": [["page", "Old Page", null]],
+        "redeployed": 3,
+        "unchanged": 412
+    }
+}
 '''
 
 def requires_canvas_review(data) -> bool:
@@ -41,19 +54,49 @@ def check_canvas_payload(data) -> bool:
     The notification is only sent if there is something to deploy,
     review or if there is an error.
     """
+    delta = data.get('deployed_delta')
+    if delta is not None:
+        deployed = delta['added'] or delta['changed'] or delta['removed'] or delta['redeployed']
+    else:
+        deployed = data['deployed_content']
+
     return (
-            data['deployed_content']
+            deployed
             or data['content_to_review']
             or data['error']
     )
 
 
+def format_items(items) -> str:
+    return '\n'.join(
+        f'- **{item[0]}**: [{item[1]}]({item[2]})' if item[2] else f'- **{item[0]}**: {item[1]}'
+        for item in items
+    )
+
+
+def deployed_content_fields(data) -> list[Field]:
+    delta = data.get('deployed_delta')
+    if delta is None:
+        return generate_field(
+            name='**Deployed Content:**',
+            value=format_items(data['deployed_content']) if data['deployed_content'] else '*No items deployed*',
+            inline=False
+        )
+
+    fields = []
+    for key, name in (('added', '**Added:**'), ('changed', '**Changed:**'), ('removed', '**Removed:**')):
+        if delta[key]:
+            fields += generate_field(name=name, value=format_items(delta[key]), inline=False)
+
+    if not fields:
+        fields = generate_field(name='**Deployed Content:**', value='*No changes*', inline=False)
+    for key, name in (('redeployed', '**Redeployed:**'), ('unchanged', '**Unchanged:**')):
+        if delta[key]:
+            fields += generate_field(name=name, value=f"{delta[key]} item(s)", inline=False)
+    return fields
+
+
 def canvas_format(data, course_id, author, author_icon, branch, action_url):
-    deployed_content = (
-        '\n'.join(f'- **{rtype}**: [{content}]({link})' if link else f'- **{rtype}**: {content}'
-                  for rtype, content, link in data['deployed_content'])) \
-        if data['deployed_content'] \
-        else '*No items deployed*'
 
     content_to_review = (
             '\n'.join(f'- [{dat[0]}]({dat[1]})'
@@ -75,11 +118,7 @@ def canvas_format(data, course_id, author, author_icon, branch, action_url):
             "color": 15861021,
             "fields": [
                 space(),
-                *generate_field(
-                    name='**Deployed Content:**',
-                    value=deployed_content,
-                    inline=False
-                ),
+                *deployed_content_fields(data),
                 space(),
                 *generate_field(
                     name='**Content to Review:**',
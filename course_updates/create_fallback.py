@@ -10,15 +10,16 @@ REQUIRED_KEYS = {
 }
 
 
+def is_valid_output(data, output_type: str) -> bool:
+    return isinstance(data, dict) and REQUIRED_KEYS[output_type].issubset(data.keys())
+
+
 def has_valid_output(output_path: str, output_type: str) -> bool:
     try:
         with open(output_path, "r") as f:
             data = json.load(f)
 
-        if not isinstance(data, dict):
-            return False
-
-        return REQUIRED_KEYS[output_type].issubset(data.keys())
+        return is_valid_output(data, output_type)
 
     except (FileNotFoundError, JSONDecodeError):
         return False
@@ -33,19 +34,10 @@ def read_log_file(log_path: str) -> Optional[str]:
         return None
 
 
-def create_fallback_output(
-    output_type: str,
-    output_path: str,
-    stdout_log: str,
-    stderr_log: str,
-    action_url: str,
-):
-    if has_valid_output(output_path, output_type):
-        print("Valid output detected — skipping fallback generation.")
-        return
-
-    log_content = read_log_file(stderr_log) or read_log_file(stdout_log)
-
+def fallback_output(output_type: str, log_content: Optional[str], action_url: str) -> dict:
+    """
+    Builds the output reported when a step crashed before writing its own.
+    """
     error_message = (
         log_content
         or f"{output_type} updates failed with no error output. "
@@ -53,32 +45,47 @@ def create_fallback_output(
     )
 
     if output_type == "MDXCanvas":
-        fallback_data = {
+        return {
             "deployed_content": [],
             "content_to_review": [],
             "error": error_message,
         }
     else:  # Docker
-        fallback_data = {
+        return {
             "updated_images": [],
             "failed_images": [],
             "error": error_message,
         }
 
+
+def create_fallback_output(
+    output_type: str,
+    output_path: str,
+    stdout_log: str,
+    stderr_log: str,
+    action_url: str,
+):
+    if has_valid_output(output_path, output_type):
+        print("Valid output detected — skipping fallback generation.")
+        return
+
+    log_content = read_log_file(stderr_log) or read_log_file(stdout_log)
+    fallback_data = fallback_output(output_type, log_content, action_url)
+
     with open(output_path, "w") as f:
         json.dump(fallback_data, f, indent=2)
 
     print(f"Fallback output written to {output_path}")
 
 
-if __name__ == "__main__":
-    parser = ArgumentParser(description="Create fallback output for MDXCanvas or Docker.")
+def cli(argv: list[str] | None = None, prog: str | None = None):
+    parser = ArgumentParser(prog=prog, description="Create fallback output for MDXCanvas or Docker.")
     parser.add_argument("--output-type", required=True, choices=["Docker", "MDXCanvas"])
     parser.add_argument("--output-path", required=True)
     parser.add_argument("--stdout-log", required=True)
     parser.add_argument("--stderr-log", required=True)
     parser.add_argument("--action-url", required=True)
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     create_fallback_output(
         args.output_type,
@@ -87,3 +94,7 @@ if __name__ == "__main__":
         args.stderr_log,
         args.action_url,
     )
+
+
+if __name__ == "__main__":
+    cli()
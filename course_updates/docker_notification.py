@@ -1,5 +1,5 @@
 from datetime import datetime
-from send_course_notification import Field, space, generate_field, truncate_error_message
+from course_updates.send_course_notification import Field, space, generate_field, truncate_error_message
 
 '''
 Example payload (15 Apr 2025 - docker_notification.py):
@@ -9,6 +9,31 @@ Example payload (15 Apr 2025 - docker_notification.py):
     "failed_images": [],
     "error": ""
 }
+
+Optional keys written by newer build_dockers.py versions:
+
+{
+    "unchanged_images": ["build-hw2-docker.sh"]
+}
+
+Optional keys written when build history is enabled:
+
+{
+    "regressions": ["build-hw1-docker.sh: duration 310s vs 200s baseline (+55%)"],
+    "flaky_images": ["build-lab2-docker.sh"]
+}
+
+Optional keys written when preflight checks stop an image from being built:
+
+{
+    "image_details": {"build-hw2-docker.sh": {"preflight": ["Dockerfile not found: Dockerfile"]}}
+}
+
+Optional keys written when size budgets are configured:
+
+{
+    "over_budget_images": ["build-hw3-docker.sh"]
+}
 '''
 
 
@@ -23,16 +48,32 @@ def requires_docker_review(data) -> bool:
 def check_docker_payload(data) -> bool:
     """
     More specific check if we add more content types to the payload.
-    The notification is only sent if there is an updated image, failed
-    image or if there is an error.
+    The notification is only sent if an image was built (updated or
+    unchanged), failed, regressed, is flaky or over budget, or if there is
+    an error.
     """
     return (
             data['updated_images']
+            or data.get('unchanged_images')
             or data['failed_images']
+            or data.get('regressions')
+            or data.get('flaky_images')
+            or data.get('over_budget_images')
             or data['error']
     )
 
 
+def preflight_reason(data, image) -> str:
+    """
+    Describes why an image was not built, if it failed the preflight checks.
+    """
+    errors = data.get('image_details', {}).get(image, {}).get('preflight')
+    if not errors:
+        return ''
+    more = f' (+{len(errors) - 1} more)' if len(errors) > 1 else ''
+    return f': {errors[0].splitlines()[0]}{more}'
+
+
 def docker_format(data, course_id, author, author_icon, branch, action_url):
     updated_images = (
         '\n'.join(f'- {image}'
@@ -41,8 +82,17 @@ def docker_format(data, course_id, author, author_icon, branch, action_url):
         else '*No updated images*'
 
 
+    unchanged_image_fields = [
+        *generate_field(
+            name='**Unchanged Image(s):**',
+            value='\n'.join(f'- {image}' for image in data['unchanged_images']),
+            inline=True
+        ),
+        space(),
+    ] if data.get('unchanged_images') else []
+
     failed_images = (
-            '\n'.join(f'- {image}'
+            '\n'.join(f'- {image}{preflight_reason(data, image)}'
                       for image in data['failed_images'])) \
         if data['failed_images'] \
         else '*No items to review*'
@@ -51,6 +101,20 @@ def docker_format(data, course_id, author, author_icon, branch, action_url):
     if error != '*No errors*':
         error = truncate_error_message(error)
 
+    build_warnings = [
+        *(f'- {regression}' for regression in data.get('regressions', [])),
+        *(f'- {image}: fails intermittently' for image in data.get('flaky_images', [])),
+        *(f'- {image}: over its size budget' for image in data.get('over_budget_images', [])),
+    ]
+    build_warning_fields = [
+        *generate_field(
+            name='**Build Warnings:**',
+            value='\n'.join(build_warnings),
+            inline=False
+        ),
+        space(),
+    ] if build_warnings else []
+
     return {
         "username": "Gradescope Notifications",
         "avatar_url": "https://tinyurl.com/mr2fyjse",
@@ -67,12 +131,14 @@ def docker_format(data, course_id, author, author_icon, branch, action_url):
                     inline=True
                 ),
                 space(),
+                *unchanged_image_fields,
                 *generate_field(
                     name='**Failed Image(s):**',
                     value=failed_images,
                     inline=True
                 ),
                 space(),
+                *build_warning_fields,
                 *generate_field(
                     name='**Error:**',
                     value=error,
@@ -0,0 +1,91 @@
+import gzip
+import os
+import shutil
+from pathlib import Path
+
+'''
+Full failure logs sent as gzip attachments next to the notification embed.
+
+Docker builds write the stderr of every failed image to a .gz file (see
+`--logs-dir` of build-dockers) and record it as `log_file` in the image
+details. Other logs, such as the stderr of an mdxcanvas run, are compressed
+here in chunks. When logs are attached the embed only keeps the last lines
+of the error.
+'''
+
+# Discord's per-message limits for webhooks
+MAX_ATTACHMENTS = 10
+MAX_ATTACHMENT_SIZE = 10 * 1024 * 1024
+
+SUMMARY_LINES = 5
+
+
+def gzip_file(source: Path, destination: Path) -> Path:
+    """
+    Compresses a file in chunks, without reading it into memory.
+    """
+    with open(source, 'rb') as f, gzip.open(destination, 'wb') as compressed:
+        shutil.copyfileobj(f, compressed)
+    return destination
+
+
+def write_gzip_log(log_path: Path, content: str) -> Path:
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(log_path, 'wt', encoding='utf-8') as f:
+        f.write(content)
+    return log_path
+
+
+def failed_image_logs(data: dict) -> list[Path]:
+    """
+    Finds the logs build_dockers wrote for the failed images.
+    """
+    details = data.get('image_details', {})
+    logs = []
+    for image in data.get('failed_images', []):
+        log_file = details.get(image, {}).get('log_file')
+        if log_file and os.path.isfile(log_file):
+            logs.append(Path(log_file))
+    return logs
+
+
+def compress_logs(log_paths: list[str], work_dir: str) -> list[Path]:
+    """
+    Gzips the given logs into work_dir (logs already gzipped are used as
+    they are). Missing and empty logs are skipped.
+    """
+    compressed = []
+    for log_path in log_paths:
+        source = Path(log_path)
+        if not source.is_file() or source.stat().st_size == 0:
+            continue
+        if source.suffix == '.gz':
+            compressed.append(source)
+        else:
+            compressed.append(gzip_file(source, Path(work_dir) / f'{source.name}.gz'))
+    return compressed
+
+
+def limit_attachments(logs: list[Path]) -> list[Path]:
+    """
+    Drops the logs Discord would reject: files over the size limit and
+    anything past the maximum number of attachments.
+    """
+    attachments = []
+    for log in logs:
+        if log.stat().st_size > MAX_ATTACHMENT_SIZE:
+            print(f"⚠️  Not attaching {log.name}: larger than {MAX_ATTACHMENT_SIZE // (1024 * 1024)}MB")
+            continue
+        attachments.append(log)
+
+    if len(attachments) > MAX_ATTACHMENTS:
+        print(f"⚠️  Attaching only the first {MAX_ATTACHMENTS} of {len(attachments)} logs")
+    return attachments[:MAX_ATTACHMENTS]
+
+
+def summarize_error(error: str, lines: int = SUMMARY_LINES) -> str:
+    """
+    Keeps the last lines of an error whose full log is attached.
+    """
+    tail = [line for line in error.strip().splitlines() if line.strip()][-lines:]
+    return '\n'.join([*tail, '(full log attached)'])
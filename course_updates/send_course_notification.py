@@ -1,8 +1,12 @@
 from argparse import ArgumentParser
 import json
 import os
+import tempfile
+from pathlib import Path
 from typing import TypedDict
-from discord_webhook import DiscordWebhook, DiscordEmbed
+
+from course_updates.log_attachments import compress_logs, failed_image_logs, limit_attachments, summarize_error
+from course_updates.webhook import execute_webhook, execute_webhook_with_files
 
 
 class Field(TypedDict):
@@ -98,39 +102,38 @@ def truncate_error_message(error: str, max_chars: int = 900) -> str:
 
 
 
-def send_parsed_discord_embed(webhook_url: str, notification: dict, requires_review:bool, cicd_id: int = None):
-    webhook = DiscordWebhook(
-        url=webhook_url,
-        username=notification.get("username"),
-        avatar_url=notification.get("avatar_url"),
-        content=f"<@&{cicd_id}>" if requires_review and cicd_id else None,
-    )
-
+def build_webhook_payload(notification: dict, requires_review: bool, cicd_id: int = None) -> dict:
+    """
+    Converts a formatted notification into a Discord webhook payload.
+    Empty field names or values are replaced with a zero-width space,
+    since Discord rejects them.
+    """
+    embeds = []
     for embed_data in notification.get("embeds", []):
-        embed = DiscordEmbed(
-            title=embed_data.get("title"),
-            description=embed_data.get("description"),
-            color=embed_data.get("color"),
-            timestamp=embed_data.get("timestamp")
-        )
+        embed = {
+            key: embed_data[key]
+            for key in ("title", "description", "color", "timestamp")
+            if embed_data.get(key) is not None
+        }
 
         # Optional author
         author = embed_data.get("author", {})
         if author:
-            embed.set_author(
-                name=author.get("name", ""),
-                icon_url=author.get("icon_url", "")
-            )
+            embed["author"] = {
+                "name": author.get("name", ""),
+                "icon_url": author.get("icon_url", "")
+            }
 
         # Optional footer
         footer = embed_data.get("footer", {})
         if footer:
-            embed.set_footer(
-                text=footer.get("text", ""),
-                icon_url=footer.get("icon_url", "")
-            )
+            embed["footer"] = {
+                "text": footer.get("text", ""),
+                "icon_url": footer.get("icon_url", "")
+            }
 
         # Fields
+        fields = []
         for field in embed_data.get("fields", []):
             field_name = field.get("name", "\u200b")
             field_value = field.get("value", "\u200b")
@@ -141,13 +144,34 @@ def send_parsed_discord_embed(webhook_url: str, notification: dict, requires_rev
             if not field_value or not field_value.strip():
                 field_value = "\u200b"
 
-            embed.add_embed_field(
+            fields.append(Field(
                 name=field_name,
                 value=field_value,
                 inline=field.get("inline", False)
-            )
+            ))
+        embed["fields"] = fields
+
+        embeds.append(embed)
+
+    payload = {
+        "username": notification.get("username"),
+        "avatar_url": notification.get("avatar_url"),
+        "embeds": embeds,
+    }
+    if requires_review and cicd_id:
+        payload["content"] = f"<@&{cicd_id}>"
+
+    return payload
 
-        webhook.add_embed(embed)
+
+def send_parsed_discord_embed(
+        webhook_url: str,
+        notification: dict,
+        requires_review: bool,
+        cicd_id: int = None,
+        attachments: list[Path] | None = None
+) -> bool:
+    payload = build_webhook_payload(notification, requires_review, cicd_id)
 
     # Calculate approximate embed size
     total_size = 0
@@ -163,52 +187,97 @@ def send_parsed_discord_embed(webhook_url: str, notification: dict, requires_rev
     if total_size > 6000:
         print(f"❌ Error: Embed size ({total_size} chars) exceeds Discord's 6000 char limit")
 
-    response = webhook.execute()
+    if attachments:
+        response = execute_webhook_with_files(webhook_url, payload, attachments)
+    else:
+        response = execute_webhook(webhook_url, payload)
     if response.status_code >= 400:
         print(f"❌ Discord returned status {response.status_code}: {response.text}")
-    else:
-        print("✅ Sent message successfully.")
+        return False
+
+    print("✅ Sent message successfully.")
+    return True
 
 
-def main(ntype, payload, course_id, author, author_icon, branch_name, action_url, cicd_id):
-    webhook_url = os.getenv("DISCORD_WEBHOOK_URL")
+def main(ntype, payload, course_id, author, author_icon, branch_name, action_url, cicd_id,
+         webhook_env="DISCORD_WEBHOOK_URL", index=None, error_logs=None):
+    with open(payload, 'r') as file:
+        data = json.load(file)
+
+    send_notification(ntype, data, course_id, author, author_icon, branch_name, action_url, cicd_id,
+                      webhook_env=webhook_env, index=index, error_logs=error_logs)
+
+
+def send_notification(ntype, data, course_id, author, author_icon, branch_name, action_url, cicd_id,
+                      webhook_env="DISCORD_WEBHOOK_URL", index=None, error_logs=None) -> bool | None:
+    """
+    Formats and sends a notification for an already loaded payload.
+
+    :return: True if the message was sent, False if Discord rejected it,
+        None if there was nothing to send
+    """
+    webhook_url = os.getenv(webhook_env)
     if not webhook_url:
-        raise EnvironmentError("DISCORD_WEBHOOK_URL environment variable is not set.")
+        raise EnvironmentError(f"{webhook_env} environment variable is not set.")
 
     # Import formatter and checker
     if ntype == "canvas":
-        from canvas_notification import canvas_format, check_canvas_payload, requires_canvas_review
+        from course_updates.canvas_notification import canvas_format, check_canvas_payload, requires_canvas_review
         format_notification = canvas_format
         has_info = check_canvas_payload
         requires_review = requires_canvas_review
     elif ntype == "docker":
-        from docker_notification import docker_format, check_docker_payload, requires_docker_review
+        from course_updates.docker_notification import docker_format, check_docker_payload, requires_docker_review
         format_notification = docker_format
         has_info = check_docker_payload
         requires_review = requires_docker_review
     else:
         raise ValueError("Invalid notification type. Use 'canvas' or 'docker'.")
 
-    with open(payload, 'r') as file:
-        data = json.load(file)
+    # Only report what changed since the deployment recorded in the index.
+    # A failed deployment is reported in full and leaves the index untouched.
+    use_index = ntype == "canvas" and index and data and not data.get('error')
+    if use_index:
+        from course_updates.canvas_index import diff_deployment, load_index, save_index
+        delta = diff_deployment(load_index(index), data['deployed_content'])
+        data['deployed_delta'] = delta.output()
+        print(f"Deployment delta: {len(delta.added)} added, {len(delta.changed)} changed, "
+              f"{len(delta.removed)} removed, {delta.redeployed} redeployed, {delta.unchanged} unchanged")
 
     if not data or not has_info(data):
         print("No information to send.")
-        return
+        if use_index:
+            save_index(index, data['deployed_content'])
+        return None
+
+    with tempfile.TemporaryDirectory(prefix="course-ops-logs-") as work_dir:
+        # Attach the full logs and keep only a summary of the error in the embed
+        error_log_files = compress_logs(error_logs or [], work_dir) if data.get("error") else []
+        attachments = limit_attachments(failed_image_logs(data) + error_log_files)
+        if any(log in attachments for log in error_log_files):
+            data["error"] = summarize_error(data["error"])
+
+        notification = format_notification(
+            data=data,
+            course_id=course_id,
+            author=author,
+            author_icon=author_icon,
+            branch=branch_name,
+            action_url=action_url,
+        )
+
+        sent = send_parsed_discord_embed(
+            webhook_url, notification, requires_review(data), cicd_id=cicd_id, attachments=attachments
+        )
 
-    notification = format_notification(
-        data=data,
-        course_id=course_id,
-        author=author,
-        author_icon=author_icon,
-        branch=branch_name,
-        action_url=action_url,
-    )
+    # Keep the old index if the changes were not announced
+    if sent and use_index:
+        save_index(index, data['deployed_content'])
+    return sent
 
-    send_parsed_discord_embed(webhook_url, notification, requires_review(data), cicd_id=cicd_id)
 
-if __name__ == "__main__":
-    parser = ArgumentParser(description="Send Canvas or Docker notifications to Discord.")
+def cli(argv: list[str] | None = None, prog: str | None = None):
+    parser = ArgumentParser(prog=prog, description="Send Canvas or Docker notifications to Discord.")
     parser.add_argument("--type", required=True, choices=["canvas", "docker"], help="Type of notification")
     parser.add_argument("--payload", required=True, help="Path to the payload JSON file")
     parser.add_argument("--course-id", required=True, help="Course ID")
@@ -217,7 +286,17 @@ if __name__ == "__main__":
     parser.add_argument("--branch", required=True, help="Branch name")
     parser.add_argument("--action-url", required=True, help="URL to the GHA")
     parser.add_argument("--cicd-id", nargs='?', const=None, default=None, help="CI/CD Role ID")
+    parser.add_argument("--webhook-env", default="DISCORD_WEBHOOK_URL",
+                        help="Environment variable holding the course's webhook URL")
+    parser.add_argument("--index", help="Canvas only: index of the previous deployment, to report only changes")
+    parser.add_argument("--error-log", action="append", default=[],
+                        help="Log attached (gzipped) when the payload reports an error; can be repeated")
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
-    main(args.type, args.payload, args.course_id, args.author, args.author_icon, args.branch, args.action_url, args.cicd_id)
+    main(args.type, args.payload, args.course_id, args.author, args.author_icon, args.branch, args.action_url,
+         args.cicd_id, webhook_env=args.webhook_env, index=args.index, error_logs=args.error_log)
+
+
+if __name__ == "__main__":
+    cli()
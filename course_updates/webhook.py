@@ -0,0 +1,178 @@
+import json
+import os
+import uuid
+from dataclasses import dataclass
+from http.client import HTTPConnection, HTTPSConnection
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit, urlunsplit
+
+'''
+Minimal Discord webhook client built on the standard library.
+
+Notification steps only ever post (or edit) a single JSON message, so this
+replaces the `discord-webhook` package and lets the workflows run the
+notification scripts without installing anything. Messages with file
+attachments are sent as multipart requests streamed from disk.
+'''
+
+USER_AGENT = "course-ops (https://github.com/BYU-CS-Course-Ops/utils, 0.1)"
+
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class WebhookResponse:
+    status_code: int
+    text: str
+
+    def json(self):
+        return json.loads(self.text) if self.text else None
+
+
+def open_connection(url: str, timeout: float = 30) -> tuple[HTTPConnection, str]:
+    """
+    Opens a connection to the host of the given URL.
+
+    :param url: The full URL being requested
+    :param timeout: Socket timeout in seconds
+    :return: Tuple of (connection, request path including the query string)
+    """
+    parts = urlsplit(url)
+    connection_cls = HTTPSConnection if parts.scheme == "https" else HTTPConnection
+    connection = connection_cls(parts.netloc, timeout=timeout)
+
+    path = parts.path or "/"
+    if parts.query:
+        path = f"{path}?{parts.query}"
+
+    return connection, path
+
+
+def with_params(url: str, params: dict | None) -> str:
+    if not params:
+        return url
+    separator = "&" if urlsplit(url).query else "?"
+    return f"{url}{separator}{urlencode(params)}"
+
+
+def execute_webhook(
+    url: str,
+    payload: dict,
+    method: str = "POST",
+    params: dict | None = None,
+    timeout: float = 30,
+) -> WebhookResponse:
+    """
+    Sends a JSON payload to a Discord webhook.
+
+    :param url: The webhook URL
+    :param payload: The message body (username, content, embeds, ...)
+    :param method: HTTP method, POST to send a message
+    :param params: Optional query parameters (e.g. {"wait": "true"})
+    :param timeout: Socket timeout in seconds
+    :return: The status code and body of the response
+    """
+    body = json.dumps(payload).encode("utf-8")
+    connection, path = open_connection(with_params(url, params), timeout)
+
+    try:
+        connection.request(method, path, body=body, headers={
+            "Content-Type": "application/json",
+            "Content-Length": str(len(body)),
+            "User-Agent": USER_AGENT,
+        })
+        response = connection.getresponse()
+        text = response.read().decode("utf-8", errors="replace")
+        return WebhookResponse(status_code=response.status, text=text)
+    finally:
+        connection.close()
+
+
+def message_url(url: str, message_id: str) -> str:
+    """
+    Gets the URL of a message sent through a webhook, keeping the
+    webhook's query string (e.g. thread_id).
+    """
+    parts = urlsplit(url)
+    return urlunsplit(parts._replace(path=f"{parts.path.rstrip('/')}/messages/{message_id}"))
+
+
+def edit_webhook_message(url: str, message_id: str, payload: dict, timeout: float = 30) -> WebhookResponse:
+    """
+    Replaces the content of a message previously sent through the webhook.
+    Send the original with params={"wait": "true"} to get its id.
+
+    :param url: The webhook URL
+    :param message_id: The id of the message to edit
+    :param payload: The new message body
+    :param timeout: Socket timeout in seconds
+    """
+    return execute_webhook(message_url(url, message_id), payload, method="PATCH", timeout=timeout)
+
+
+def execute_webhook_with_files(
+    url: str,
+    payload: dict,
+    files: list[Path],
+    params: dict | None = None,
+    timeout: float = 120,
+) -> WebhookResponse:
+    """
+    Sends a message with file attachments as multipart/form-data. The
+    files are streamed from disk in chunks instead of being read into
+    memory, so the Content-Length is computed from their sizes up front.
+
+    :param url: The webhook URL
+    :param payload: The message body (username, content, embeds, ...)
+    :param files: The files to attach
+    :param params: Optional query parameters (e.g. {"wait": "true"})
+    :param timeout: Socket timeout in seconds
+    :return: The status code and body of the response
+    """
+    boundary = uuid.uuid4().hex
+    payload = dict(payload, attachments=[
+        {"id": index, "filename": file.name} for index, file in enumerate(files)
+    ])
+
+    head = (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="payload_json"\r\n'
+        f'Content-Type: application/json\r\n\r\n'
+    ).encode("utf-8") + json.dumps(payload).encode("utf-8") + b"\r\n"
+    file_headers = [
+        (
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="files[{index}]"; filename="{file.name}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'
+        ).encode("utf-8")
+        for index, file in enumerate(files)
+    ]
+    tail = f"--{boundary}--\r\n".encode("utf-8")
+
+    content_length = len(head) + len(tail) + sum(
+        len(header) + os.path.getsize(file) + 2
+        for header, file in zip(file_headers, files)
+    )
+
+    connection, path = open_connection(with_params(url, params), timeout)
+    try:
+        connection.putrequest("POST", path)
+        connection.putheader("Content-Type", f"multipart/form-data; boundary={boundary}")
+        connection.putheader("Content-Length", str(content_length))
+        connection.putheader("User-Agent", USER_AGENT)
+        connection.endheaders()
+
+        connection.send(head)
+        for header, file in zip(file_headers, files):
+            connection.send(header)
+            with open(file, "rb") as f:
+                while chunk := f.read(CHUNK_SIZE):
+                    connection.send(chunk)
+            connection.send(b"\r\n")
+        connection.send(tail)
+
+        response = connection.getresponse()
+        text = response.read().decode("utf-8", errors="replace")
+        return WebhookResponse(status_code=response.status, text=text)
+    finally:
+        connection.close()
@@ -0,0 +1,421 @@
+import argparse
+import json
+import os
+import re
+import shlex
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from docker_updates.build_history import format_size
+
+'''
+Build context minimization.
+
+Build scripts run `docker build` from their own folder, so the whole
+assignment folder (solutions, test worlds, stray artifacts) is sent as the
+build context. This reads the COPY/ADD sources of the image's Dockerfile and
+generates a .dockerignore that only lets those sources through, or checks an
+existing hand-written one.
+
+Generated files start with GENERATED_HEADER and are regenerated freely; a
+hand-written .dockerignore is never overwritten, only checked.
+
+Scripts whose build context is not their own folder (e.g. `docker build ..`)
+are skipped: that context is usually shared with other images, so a
+.dockerignore generated for one Dockerfile would break the others.
+'''
+
+GENERATED_HEADER = '# Generated by course-ops build-context. Edits will be overwritten.'
+
+DOCKER_BUILD = re.compile(r'\bdocker\b.*\bbuild\b')
+DOCKERFILE_FLAG = re.compile(r'(?:^|\s)(?:-f|--file)(?:\s+|=)(["\']?)(\S+?)\1(?=\s|$)')
+HEREDOC = re.compile(r'<<-?\s*(["\']?)(\w+)\1[^\n]*\n(.*?)\n\s*\2\s*$', re.DOTALL | re.MULTILINE)
+DOCKERFILE_HEREDOC = re.compile(r'^<<-?(["\']?)(\w+)\1$')
+INSTRUCTION = re.compile(r'^\s*(\w+)\s+(.*)$', re.DOTALL)
+VARIABLE = re.compile(r'\$\{[^}]*\}|\$\w+')
+
+# `docker build` options that take no value
+BUILD_SWITCHES = {
+    '--push', '--load', '--no-cache', '--pull', '-q', '--quiet', '--rm', '--force-rm',
+    '--squash', '--compress', '--disable-content-trust', '--check', '--debug',
+}
+
+
+@dataclass
+class ContextReport:
+    docker_script: Path
+    # None when the sources cannot be narrowed down (e.g. `COPY . .`)
+    sources: list[str] | None
+    size_before: int = 0
+    size_after: int = 0
+    hand_written: bool = False
+    # Sources a hand-written .dockerignore excludes even though they are used
+    excluded_sources: list[str] = field(default_factory=list)
+    written: bool = False
+    # Why the context was not analysed, if it was not
+    skipped: str | None = None
+
+    def output(self) -> dict:
+        if self.skipped:
+            return {}
+        return {
+            "context_size": self.size_before,
+            "minimized_context_size": self.size_after,
+        }
+
+    def describe(self) -> str:
+        name = self.docker_script.name
+        if self.skipped:
+            return f'{name}: skipped ({self.skipped})'
+        if self.sources is None:
+            return f'{name}: {format_size(self.size_before)} (sources could not be determined)'
+
+        status = f'{name}: {format_size(self.size_before)} -> {format_size(self.size_after)}'
+        if self.hand_written:
+            status += ' (hand-written .dockerignore, not modified)'
+        if self.excluded_sources:
+            status += f" [excluded but used: {', '.join(self.excluded_sources)}]"
+        return status
+
+
+class IgnorePatterns:
+    """
+    .dockerignore matching: the last matching pattern wins, `!` re-includes,
+    and a pattern matching a folder applies to everything inside it.
+    """
+
+    def __init__(self, lines: list[str]):
+        self.patterns = []
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            negate = line.startswith('!')
+            pattern = os.path.normpath(line.lstrip('!').strip()).lstrip('/')
+            self.patterns.append((negate, re.compile(translate_pattern(pattern))))
+
+    def ignored(self, relative_path: str) -> bool:
+        parts = relative_path.split('/')
+        prefixes = ['/'.join(parts[:i + 1]) for i in range(len(parts))]
+
+        ignored = False
+        for negate, regex in self.patterns:
+            if any(regex.fullmatch(prefix) for prefix in prefixes):
+                ignored = not negate
+        return ignored
+
+
+def translate_pattern(pattern: str) -> str:
+    """
+    Translates a .dockerignore glob into a regular expression.
+    """
+    regex = ''
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith('**/', i):
+            regex += '(?:.*/)?'
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            regex += '.*'
+            i += 2
+            continue
+
+        if char == '*':
+            regex += '[^/]*'
+        elif char == '?':
+            regex += '[^/]'
+        elif char == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                regex += re.escape(char)
+            else:
+                regex += '[' + pattern[i + 1:end].replace('\\', '\\\\') + ']'
+                i = end
+        else:
+            regex += re.escape(char)
+        i += 1
+    return regex
+
+
+def dockerfile_reference(script: str) -> str | None:
+    """
+    Finds the Dockerfile argument of the `docker build` commands in a build
+    script: the `-f` value (`-` for stdin), or `Dockerfile` by default.
+
+    :return: The reference, or None if the script never runs `docker build`
+    """
+    reference = None
+    # Only look at `docker build` commands, so `rm -f ...` is not mistaken for a Dockerfile
+    for line in script.replace('\\\n', ' ').split('\n'):
+        if DOCKER_BUILD.search(line):
+            match = DOCKERFILE_FLAG.search(line)
+            if match:
+                return match.group(2)
+            reference = 'Dockerfile'
+    return reference
+
+
+def context_reference(script: str) -> str | None:
+    """
+    Finds the build context argument of the first `docker build` command in
+    a build script (e.g. `.`, `..` or `-`).
+
+    :return: The context, or None if it cannot be determined
+    """
+    for line in script.replace('\\\n', ' ').split('\n'):
+        if not DOCKER_BUILD.search(line):
+            continue
+        try:
+            words = shlex.split(line, comments=True)
+        except ValueError:
+            return None
+        if 'build' not in words:
+            continue
+
+        takes_value = False
+        for word in words[words.index('build') + 1:]:
+            if takes_value:
+                takes_value = False
+            elif word in ('|', '||', '&&', ';') or word[:1] in ('<', '>') or word[:2] in ('2>', '1>'):
+                break
+            elif word.startswith('-') and word != '-':
+                takes_value = '=' not in word and word not in BUILD_SWITCHES
+            else:
+                return word
+        return None
+    return None
+
+
+def find_dockerfile(docker_script: Path) -> str | None:
+    """
+    Reads the Dockerfile a build script uses: the `-f` argument (including
+    `-f -` with a heredoc), or `Dockerfile` next to the script.
+    """
+    script = docker_script.read_text()
+    reference = dockerfile_reference(script) or 'Dockerfile'
+
+    if reference == '-':
+        heredoc = HEREDOC.search(script)
+        return heredoc.group(3) if heredoc else None
+
+    dockerfile = docker_script.parent / reference
+    if '$' in str(dockerfile) or not dockerfile.is_file():
+        return None
+    return dockerfile.read_text()
+
+
+def heredoc_delimiters(line: str) -> list[str]:
+    """
+    Finds the heredocs (`<<EOF`, `<<-"EOF"`) opened by an instruction. Only
+    standalone shell words count, so `"print(1<<20)"` is not a heredoc.
+    """
+    try:
+        words = shlex.split(line, posix=False)
+    except ValueError:
+        words = line.split()
+    return [match.group(2) for match in map(DOCKERFILE_HEREDOC.match, words) if match]
+
+
+def dockerfile_instructions(dockerfile: str) -> list[tuple[str, str]]:
+    """
+    Splits a Dockerfile into (INSTRUCTION, arguments), joining continued
+    lines and keeping heredoc bodies (`RUN <<EOF`) in the arguments.
+    Comments and empty lines inside a continuation are skipped, as docker does.
+    """
+    instructions = []
+    current = ''
+    lines = iter(dockerfile.splitlines())
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            continue
+        if stripped.endswith('\\'):
+            current += stripped[:-1] + ' '
+            continue
+
+        current += stripped
+        for delimiter in heredoc_delimiters(current):
+            for body in lines:
+                current += '\n' + body
+                if body.strip() == delimiter:
+                    break
+
+        match = INSTRUCTION.match(current)
+        if match:
+            instructions.append((match.group(1).upper(), match.group(2).strip()))
+        current = ''
+
+    return instructions
+
+
+def instruction_arguments(arguments: str) -> list[str]:
+    if arguments.startswith('['):
+        try:
+            return json.loads(arguments)
+        except json.JSONDecodeError:
+            pass
+    try:
+        return shlex.split(arguments)
+    except ValueError:
+        return arguments.split()
+
+
+def context_sources(dockerfile: str) -> list[str] | None:
+    """
+    Finds the context paths a Dockerfile uses through COPY, ADD and
+    RUN --mount=type=bind. Variables become wildcards.
+
+    :return: The source patterns, or None if the whole context is used
+    """
+    sources = ['Dockerfile', '.dockerignore']
+    for instruction, arguments in dockerfile_instructions(dockerfile):
+        if instruction in ('COPY', 'ADD'):
+            # Heredoc bodies follow the first line, and `<<EOF` sources are inline files
+            args = instruction_arguments(arguments.split('\n', 1)[0])
+            flags = [arg for arg in args if arg.startswith('--')]
+            paths = [arg for arg in args if not arg.startswith('--')]
+
+            if any(flag.startswith('--from=') for flag in flags):
+                continue
+            if len(paths) < 2:
+                continue
+
+            for source in paths[:-1]:
+                if source.startswith('<<'):
+                    continue
+                if instruction == 'ADD' and re.match(r'^(https?|git)[:@]', source):
+                    continue
+                sources.append(source)
+
+        elif instruction == 'RUN' and '--mount=' in arguments:
+            for arg in instruction_arguments(arguments):
+                if not arg.startswith('--mount='):
+                    continue
+                options = dict(
+                    option.partition('=')[::2]
+                    for option in arg[len('--mount='):].split(',')
+                )
+                if options.get('type') == 'bind' and 'from' not in options:
+                    sources.append(options.get('source', options.get('src', '.')))
+
+    patterns = []
+    for source in sources:
+        source = VARIABLE.sub('*', source)
+        source = os.path.normpath(source).lstrip('/')
+        if source in ('.', '*', '**'):
+            return None
+        patterns.append(source)
+
+    return patterns
+
+
+def generate_dockerignore(sources: list[str]) -> str:
+    lines = [GENERATED_HEADER, '*']
+    lines += [f'!{source}' for source in sorted(set(sources))]
+    return '\n'.join(lines) + '\n'
+
+
+def context_size(directory: Path, patterns: IgnorePatterns | None) -> int:
+    """
+    Sums the sizes of the files docker would send from a build context.
+    """
+    total = 0
+    for folder, subfolders, files in os.walk(directory):
+        relative_folder = os.path.relpath(folder, directory)
+        for name in files:
+            relative = name if relative_folder == '.' else f'{relative_folder}/{name}'
+            if patterns is None or not patterns.ignored(relative):
+                try:
+                    total += os.path.getsize(os.path.join(folder, name))
+                except OSError:
+                    pass
+    return total
+
+
+def minimize_context(docker_script: Path, write: bool = False) -> ContextReport:
+    """
+    Measures a build script's context before and after minimization and,
+    if requested, writes the generated .dockerignore.
+
+    :param docker_script: Path to the docker build script
+    :param write: Write the .dockerignore (never replaces a hand-written one)
+    """
+    directory = docker_script.parent
+    context = context_reference(docker_script.read_text())
+    if context is not None and os.path.normpath(context) != '.':
+        return ContextReport(
+            docker_script=docker_script,
+            sources=None,
+            skipped=f'the build context is {context}, not the script folder'
+        )
+
+    ignore_file = directory / '.dockerignore'
+
+    existing = ignore_file.read_text() if ignore_file.is_file() else None
+    hand_written = existing is not None and not existing.startswith(GENERATED_HEADER)
+    current = IgnorePatterns(existing.splitlines()) if existing else None
+
+    dockerfile = find_dockerfile(docker_script)
+    sources = context_sources(dockerfile) if dockerfile is not None else None
+
+    report = ContextReport(
+        docker_script=docker_script,
+        sources=sources,
+        size_before=context_size(directory, current),
+        hand_written=hand_written,
+    )
+
+    if sources is None:
+        report.size_after = report.size_before
+        return report
+
+    if hand_written:
+        report.size_after = report.size_before
+        report.excluded_sources = [
+            source for source in sources
+            if '*' not in source and (directory / source).exists() and current.ignored(source)
+        ]
+        return report
+
+    generated = generate_dockerignore(sources)
+    report.size_after = context_size(directory, IgnorePatterns(generated.splitlines()))
+
+    if write and generated != existing:
+        ignore_file.write_text(generated)
+        report.written = True
+
+    return report
+
+
+def main(root_dir: str, files: str | None, write: bool):
+    from docker_updates.build_dockers import collect_docker_files
+    from docker_updates.rebuild_all import rebuild_all
+
+    root = Path(root_dir).resolve()
+    docker_scripts = collect_docker_files(files, root) if files else rebuild_all(root)
+
+    total_before = total_after = 0
+    for docker_script in sorted(docker_scripts):
+        report = minimize_context(docker_script, write=write)
+        total_before += report.size_before
+        total_after += report.size_after
+        print(f"{'(written) ' if report.written else ''}{report.describe()}")
+
+    print(f"\nTotal context: {format_size(total_before)} -> {format_size(total_after)}")
+
+
+def cli(argv: list[str] | None = None, prog: str | None = None):
+    parser = argparse.ArgumentParser(prog=prog, description='Generate or check .dockerignore files for build contexts.')
+    parser.add_argument('--root-dir', required=True)
+    parser.add_argument('--files', help='Only analyse images affected by these changed files')
+    parser.add_argument('--write', action='store_true', help='Write the generated .dockerignore files')
+    args = parser.parse_args(argv)
+
+    main(root_dir=args.root_dir, files=args.files, write=args.write)
+
+
+if __name__ == '__main__':
+    cli()
@@ -1,84 +1,142 @@
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from dataclasses import dataclass, field
 from pathlib import Path
+import os
 import subprocess
 import json
-
-from rebuild_all import has_include, rebuild_all
+import threading
+import time
+
+from course_updates.log_attachments import write_gzip_log
+from docker_updates.build_context import minimize_context
+from docker_updates.build_history import (
+    BuildRecord, open_history, record_builds, find_regressions, find_flaky_images,
+    hash_build_context, last_successful_build, now_timestamp, format_size
+)
+from docker_updates.build_steps import StepTimer
+from docker_updates.image_inspect import (
+    ImageAnalysis, SizeBudgets, analyze_image, find_image_tag, load_size_budgets
+)
+from docker_updates import live_progress
+from docker_updates.live_progress import LiveProgress, NotificationInfo
+from docker_updates.path_rules import PathRules, default_path_rules, load_path_rules
+from docker_updates.prefetch import BaseImagePrefetcher, start_prefetch
+from docker_updates.preflight import preflight
+from docker_updates.push_guard import NOT_CHECKED, UNCHANGED, push_guard_env, read_push_log
+from docker_updates.rebuild_all import has_include, rebuild_all
 
 
 @dataclass
 class DockerBuildResult:
     updated_images: list[str] = field(default_factory=list)
+    unchanged_images: list[str] = field(default_factory=list)
     failed_images: list[str] = field(default_factory=list)
     error: str = ""
+    image_details: dict[str, dict] = field(default_factory=dict)
+    regressions: list[str] = field(default_factory=list)
+    flaky_images: list[str] = field(default_factory=list)
+    over_budget_images: list[str] = field(default_factory=list)
 
     def add_updated_image(self, docker_image: Path):
         self.updated_images.append(docker_image.name)
 
+    def add_unchanged_image(self, docker_image: Path):
+        self.unchanged_images.append(docker_image.name)
+
     def add_failed_image(self, docker_image: Path):
         self.failed_images.append(docker_image.name)
 
     def add_error_message(self, error: str):
         self.error = error
 
+    def add_image_details(self, docker_image: Path, **details):
+        self.image_details.setdefault(docker_image.name, {}).update(details)
+
+    def add_over_budget_image(self, docker_image: Path):
+        self.over_budget_images.append(docker_image.name)
+
     def output(self):
         return {
             "updated_images": self.updated_images,
+            "unchanged_images": self.unchanged_images,
             "failed_images": self.failed_images,
             "error": self.error,
+            "image_details": self.image_details,
+            "regressions": self.regressions,
+            "flaky_images": self.flaky_images,
+            "over_budget_images": self.over_budget_images,
         }
 
 
+@dataclass
+class BuildOptions:
+    size_budgets: SizeBudgets = field(default_factory=SizeBudgets)
+    path_rules: PathRules = field(default_factory=default_path_rules)
+    # Skip `docker push` when the registry already has the built image
+    skip_unchanged_pushes: bool = True
+    # Let build scripts push at all (watch mode turns this off)
+    push: bool = True
+    # Write a .dockerignore limited to the Dockerfile's COPY/ADD sources before building
+    minimize_context: bool = False
+    # Number of concurrent base image pulls started before building (0 disables)
+    prefetch_concurrency: int = 4
+    prefetcher: BaseImagePrefetcher | None = None
+    # Maximum number of images built at the same time (None is unbounded)
+    max_parallel: int | None = None
+    # Folder receiving the gzipped stderr of every failed build
+    logs_dir: Path | None = None
+    # Check all scripts and Dockerfiles before building anything
+    preflight: bool = True
+    # Discord message edited as images are built (opt-in)
+    progress: LiveProgress | None = None
+    # Build processes currently running, so they can be cancelled (watch mode)
+    running: dict[Path, subprocess.Popen] = field(default_factory=dict)
+
+
 def find_build_docker_scripts(dir: Path) -> Path | None:
     """
     Finds the build docker scripts in the given directory.
 
     :param dir: The directory to search in. (Ideally, this is an assignment folder)
     """
+    if not dir.is_dir():
+        return None
+
     for file in dir.iterdir():
         if file.is_file() and file.name.startswith('build') and file.name.endswith('docker.sh'):
             return file.absolute()
     return None
 
 
-def find_assignments(files: list[Path]) -> set[Path]:
+def find_assignments(files: list[Path], rules: PathRules | None = None, root: Path | None = None) -> set[Path]:
     """
     Finds the assignment directories from the list of changed files.
 
     :param files: The list of changed files.
+    :param rules: Rules mapping files to assignment folders (defaults to
+        solution/worlds/test_files/activities detection)
+    :param root: Root directory of the repository, rules match relative to it
     :return: A set of assignment folders.
     """
-    assignments = set()
-    for file in files:
-        file = Path(file)
-
-        # Check if the file is in a solution folder
-        if 'solution' in file.parent.name:
-            assignments.add(file.parent.parent)
-
-        # Check if the file is a test file
-        elif 'worlds' in file.parent.name or 'test_files' in file.parent.name:
-            assignments.add(file.parent.parent.parent)
-
-        # Check if the file is in an activities json file
-        elif 'activities' in file.name:
-            assignments.add(file.parent)
-
-    return assignments
+    rules = rules or default_path_rules()
+    return rules.assignment_roots(files, root)
 
 
-def find_docker_images(files: list[Path]) -> set[Path]:
+def find_docker_images(files: list[Path], rules: PathRules | None = None, root: Path | None = None) -> set[Path]:
     """
     Finds the docker scripts for the changed assignments.
 
     :param files: The list of changed files in the repository.
+    :param rules: Rules mapping files to assignment folders
+    :param root: Root directory of the repository
     :return: A set of docker scripts.
     """
     docker_images = set()
 
     # Find the assignment folders from the list of changed files
-    changed_assignments = find_assignments(files)
+    changed_assignments = find_assignments(files, rules, root)
 
     for assignment in changed_assignments:
         docker_image = find_build_docker_scripts(assignment)
@@ -121,113 +179,266 @@ def separate_base_and_assignment_images(docker_scripts: set[Path]) -> tuple[list
     return base_images, assignment_images
 
 
-def build_docker_image(docker_script: Path, result: DockerBuildResult) -> bool:
+def size_changes(
+        size: int | None,
+        layer_count: int | None,
+        previous_size: int | None,
+        previous_layer_count: int | None
+) -> dict:
+    changes = {}
+    if size is not None and previous_size is not None:
+        changes["size_change"] = size - previous_size
+    if layer_count is not None and previous_layer_count is not None:
+        changes["layer_change"] = layer_count - previous_layer_count
+    return changes
+
+
+def record_image_analysis(
+        docker_script: Path,
+        image: str,
+        previous: ImageAnalysis | None,
+        result: DockerBuildResult,
+        options: BuildOptions
+):
+    """
+    Inspects a freshly built image and records its size, layers and the
+    difference from the image it replaced. Images larger than their size
+    budget are marked as over budget.
+
+    :param docker_script: Path to the docker build script
+    :param image: The image reference the script produces
+    :param previous: Analysis of the local image before the build, if any
+    :param result: Result object to track the image details
+    :param options: Build options holding the size budgets
+    """
+    analysis = analyze_image(image)
+    if analysis is None:
+        # Multi-platform buildx builds push without loading into the local store
+        return
+
+    details = analysis.output()
+    if previous:
+        details.update(size_changes(analysis.size, analysis.layer_count, previous.size, previous.layer_count))
+
+    print(f"  {docker_script.name}: {format_size(analysis.size)}, {analysis.layer_count} layers")
+
+    budget = options.size_budgets.budget_for(docker_script)
+    if budget is not None:
+        details["size_budget"] = budget
+        details["over_budget"] = analysis.size > budget
+        if analysis.size > budget:
+            result.add_over_budget_image(docker_script)
+            print(f"! {docker_script.name} is over its size budget "
+                  f"({format_size(analysis.size)} > {format_size(budget)})")
+
+    result.add_image_details(docker_script, **details)
+
+
+
+def read_build_output(process: subprocess.Popen, timer: StepTimer) -> tuple[str, str]:
+    """
+    Reads a build script's stdout and stderr line by line as they arrive,
+    feeding BuildKit's progress to the step timer.
+
+    :return: Tuple of (stdout, stderr)
+    """
+    def read(stream, lines: list[str]):
+        for line in stream:
+            lines.append(line)
+            timer.feed(line)
+
+    stdout, stderr = [], []
+    reader = threading.Thread(target=read, args=(process.stdout, stdout))
+    reader.start()
+    read(process.stderr, stderr)
+    reader.join()
+    process.wait()
+    return ''.join(stdout), ''.join(stderr)
+
+
+def build_docker_image(docker_script: Path, result: DockerBuildResult, options: BuildOptions | None = None) -> bool:
     """
     Builds a single docker image synchronously.
 
     :param docker_script: Path to the docker build script
     :param result: Result object to track success/failure
+    :param options: Build options (size budgets, ...)
     :return: True if build succeeded, False otherwise
     """
+    options = options or BuildOptions()
     print(f"Building: {docker_script.name}")
 
-    process = subprocess.Popen(
-        ['bash', str(docker_script)],
-        cwd=docker_script.parent,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        universal_newlines=True
-    )
+    image = find_image_tag(docker_script)
+    previous = analyze_image(image) if image else None
 
-    stdout, stderr = process.communicate()
+    if options.minimize_context:
+        context = minimize_context(docker_script, write=True)
+        result.add_image_details(docker_script, **context.output())
+        print(f"  Context {context.describe()}")
 
-    if process.returncode == 0:
-        result.add_updated_image(docker_script)
-        print(f"✓ Successfully built: {docker_script.name}")
-        return True
+    if options.prefetcher:
+        options.prefetcher.wait_for(docker_script)
+
+    if options.progress:
+        options.progress.update(docker_script, live_progress.BUILDING)
+
+    if options.skip_unchanged_pushes or not options.push:
+        guard = push_guard_env(push=options.push)
     else:
+        guard = nullcontext((None, None))
+    with guard as (env, push_log):
+        # Step timing needs the plain progress output
+        env = dict(os.environ if env is None else env, BUILDKIT_PROGRESS='plain')
+        timer = StepTimer()
+
+        start = time.monotonic()
+        process = subprocess.Popen(
+            ['bash', str(docker_script)],
+            cwd=docker_script.parent,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            start_new_session=True,
+            env=env
+        )
+        options.running[docker_script] = process
+
+        try:
+            stdout, stderr = read_build_output(process, timer)
+        finally:
+            options.running.pop(docker_script, None)
+        duration = time.monotonic() - start
+
+        pushes = read_push_log(push_log) if push_log else {}
+
+    result.add_image_details(docker_script, image=image, duration=round(duration, 2))
+    if pushes:
+        result.add_image_details(docker_script, pushes=pushes)
+    result.add_image_details(docker_script, **timer.summary())
+
+    if process.returncode != 0:
         result.add_failed_image(docker_script)
         print(f"✗ Failed to build: {docker_script.name}")
         print(stderr)
+        if options.logs_dir:
+            log_file = write_gzip_log(options.logs_dir / f'{docker_script.stem}.stderr.log.gz', stderr)
+            result.add_image_details(docker_script, log_file=str(log_file))
+        if options.progress:
+            options.progress.update(docker_script, live_progress.FAILED)
         return False
 
+    if pushes and all(outcome == UNCHANGED for outcome in pushes.values()):
+        result.add_unchanged_image(docker_script)
+        print(f"✓ Built, unchanged in registry: {docker_script.name}")
+        if options.progress:
+            options.progress.update(docker_script, live_progress.UNCHANGED)
+    else:
+        result.add_updated_image(docker_script)
+        print(f"✓ Successfully built: {docker_script.name}")
+        if options.progress:
+            options.progress.update(docker_script, live_progress.UPDATED)
+
+    unchecked = sorted(image for image, outcome in pushes.items() if outcome == NOT_CHECKED)
+    if unchecked:
+        print(f"  Pushed without checking the registry: {', '.join(unchecked)}")
 
-def build_images_parallel(docker_scripts: list[Path], result: DockerBuildResult):
+    if image:
+        record_image_analysis(docker_script, image, previous, result, options)
+    return True
+
+
+def build_images_parallel(docker_scripts: list[Path], result: DockerBuildResult, options: BuildOptions | None = None):
     """
     Builds multiple docker images in parallel.
 
     :param docker_scripts: List of docker build scripts
     :param result: Result object to track success/failure
+    :param options: Build options (size budgets, ...)
     """
     if not docker_scripts:
         return
 
-    processes = []
-
     print(f"Building {len(docker_scripts)} images in parallel...")
 
-    for docker_script in docker_scripts:
-        process = subprocess.Popen(
-            ['bash', str(docker_script)],
-            cwd=docker_script.parent,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True
-        )
-        processes.append((process, docker_script))
+    max_workers = len(docker_scripts)
+    if options and options.max_parallel:
+        max_workers = min(max_workers, options.max_parallel)
 
-    # Wait for all processes to complete
-    for process, docker_script in processes:
-        stdout, stderr = process.communicate()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(lambda script: build_docker_image(script, result, options), docker_scripts))
 
-        if process.returncode == 0:
-            result.add_updated_image(docker_script)
-            print(f"✓ Successfully built: {docker_script.name}")
-        else:
-            result.add_failed_image(docker_script)
-            print(f"✗ Failed to build: {docker_script.name}")
-            print(stderr)
+
+def run_preflight(docker_scripts: set[Path], result: DockerBuildResult) -> dict[Path, list[str]]:
+    """
+    Checks all planned builds and records the ones that cannot be built
+    (and the images depending on them) as failed.
+
+    :return: Mapping of each failed script to its problems
+    """
+    print(f"\n=== Preflight checks for {len(docker_scripts)} image(s) ===")
+    failures = preflight(docker_scripts)
+
+    for docker_script, errors in sorted(failures.items()):
+        result.add_failed_image(docker_script)
+        result.add_image_details(docker_script, preflight=errors)
+        print(f"✗ Preflight failed: {docker_script.name}")
+        for error in errors:
+            print(f"  - {error}")
+
+    return failures
 
 
-def run_docker_scripts(docker_scripts: set[Path], result: DockerBuildResult):
+def run_docker_scripts(docker_scripts: set[Path], result: DockerBuildResult, options: BuildOptions | None = None):
     """
     Runs the docker scripts. Base images are built first sequentially,
     then assignment images are built in parallel.
 
     :param docker_scripts: The set of docker scripts to run.
     :param result: The result object to track build outcomes.
+    :param options: Build options (size budgets, ...)
     """
     if not docker_scripts:
         print("No docker scripts to build")
         return
 
+    failures = run_preflight(docker_scripts, result) if not options or options.preflight else {}
+
+    if options and options.progress:
+        options.progress.queued(sorted(docker_scripts))
+        for docker_script in failures:
+            options.progress.update(docker_script, live_progress.FAILED)
+
     # Separate base and assignment images
-    base_images, assignment_images = separate_base_and_assignment_images(docker_scripts)
+    base_images, assignment_images = separate_base_and_assignment_images(docker_scripts - failures.keys())
 
     # Build base images first (sequentially)
     if base_images:
         print(f"\n=== Building {len(base_images)} base image(s) first ===")
         for base_image in base_images:
-            success = build_docker_image(base_image, result)
+            success = build_docker_image(base_image, result, options)
             if not success:
                 print(f"Warning: Base image {base_image.name} failed to build")
 
     # Build assignment images in parallel
     if assignment_images:
         print(f"\n=== Building {len(assignment_images)} assignment image(s) ===")
-        build_images_parallel(assignment_images, result)
+        build_images_parallel(assignment_images, result, options)
 
     print("\n=== Build Summary ===")
     print(f"Updated: {len(result.updated_images)}")
+    print(f"Unchanged: {len(result.unchanged_images)}")
     print(f"Failed: {len(result.failed_images)}")
+    if result.over_budget_images:
+        print(f"Over budget: {len(result.over_budget_images)}")
 
 
-def collect_docker_files(files: str, root: Path) -> set[Path]:
+def collect_docker_files(files: str, root: Path, rules: PathRules | None = None) -> set[Path]:
     """
     Collects all docker build scripts that need to be run.
 
     :param files: Space-separated string of changed files
     :param root: Root directory of the repository
+    :param rules: Rules mapping changed files to assignment folders
     :return: Set of docker build scripts to run
     """
     # Check if the include folder has been modified
@@ -249,17 +460,75 @@ def collect_docker_files(files: str, root: Path) -> set[Path]:
     }
 
     # Get docker files from changed assignments
-    docker_files_from_assignments = find_docker_images(changed_files)
+    docker_files_from_assignments = find_docker_images(changed_files, rules, root)
 
     # Union docker files
     return updated_docker_files | docker_files_from_assignments
 
 
-def main(files: str, output_file: str, root_dir: str):
+def record_build_history(db_path: str, docker_scripts: set[Path], result: DockerBuildResult):
+    """
+    Stores the outcome of every built image in the history database, then
+    flags regressions and intermittent failures among those images.
+
+    :param db_path: Path to the SQLite history database
+    :param docker_scripts: The scripts that were built
+    :param result: The result object holding the build outcomes
+    """
+    timestamp = now_timestamp()
+    records = []
+    for script in docker_scripts:
+        details = result.image_details.get(script.name)
+        # Images stopped by preflight were never built
+        if details is None or "duration" not in details:
+            continue
+
+        records.append(BuildRecord(
+            image=script.name,
+            content_hash=hash_build_context(script.parent),
+            duration=details["duration"],
+            image_size=details.get("size"),
+            layer_count=details.get("layer_count"),
+            success=script.name in result.updated_images or script.name in result.unchanged_images,
+            timestamp=timestamp
+        ))
+
+    connection = open_history(db_path)
+    try:
+        # On CI the previous image is never in the local store, so
+        # size changes are measured against the last recorded build instead
+        for record in records:
+            details = result.image_details[record.image]
+            previous = last_successful_build(connection, record.image)
+            if previous is None or "size_change" in details:
+                continue
+            details.update(size_changes(
+                record.image_size, record.layer_count, previous.image_size, previous.layer_count
+            ))
+
+        record_builds(connection, records)
+        images = [record.image for record in records]
+        result.regressions = [r.describe() for r in find_regressions(connection, images)]
+        result.flaky_images = find_flaky_images(connection, images)
+    finally:
+        connection.close()
+
+
+def main(
+        files: str,
+        output_file: str,
+        root_dir: str,
+        history_db: str | None = None,
+        options: BuildOptions | None = None
+):
     root = Path(root_dir).resolve()
+    options = options or BuildOptions()
 
     # Collect all docker files that need to be built
-    docker_files = collect_docker_files(files, root)
+    docker_files = collect_docker_files(files, root, options.path_rules)
+
+    # Start pulling base images while the builds are being scheduled
+    options.prefetcher = start_prefetch(docker_files, options.prefetch_concurrency)
 
     # Initialize the output JSON object
     result = DockerBuildResult()
@@ -269,10 +538,19 @@ def main(files: str, output_file: str, root_dir: str):
 
     # Build docker images
     try:
-        run_docker_scripts(docker_files, result)
+        run_docker_scripts(docker_files, result, options)
     except Exception as e:
         result.add_error_message(str(e))
         print(f"Error during build process: {e}")
+    finally:
+        if options.prefetcher:
+            options.prefetcher.shutdown()
+
+    if history_db:
+        try:
+            record_build_history(history_db, docker_files, result)
+        except Exception as e:
+            print(f"Failed to update build history: {e}")
 
     # Write the output to the specified file
     with open(output_file, 'w') as f:
@@ -280,12 +558,116 @@ def main(files: str, output_file: str, root_dir: str):
 
     print(f"\nResults written to: {output_file}")
 
+    if options.progress:
+        options.progress.finish(result.output())
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser()
+
+def add_build_arguments(parser: argparse.ArgumentParser):
+    """
+    Adds the build options shared by build-dockers and run-pipeline.
+    """
+    parser.add_argument('--max-parallel', type=int, help='Maximum number of images built at the same time')
+    parser.add_argument('--path-rules', help='JSON rules file mapping changed files to assignment folders')
+    parser.add_argument('--always-push', action='store_true',
+                        help='Push images even when the registry already has the same digest')
+    parser.add_argument('--minimize-context', action='store_true',
+                        help='Generate a .dockerignore limited to the files each Dockerfile uses')
+    parser.add_argument('--prefetch-concurrency', type=int, default=4,
+                        help='Concurrent base image pulls started before building (0 disables; '
+                             'only used with builders reading the local image store)')
+    parser.add_argument('--history-db', help='SQLite database used to track build times and sizes')
+    parser.add_argument('--size-budgets', help='JSON file mapping build scripts (or globs) to maximum image sizes')
+    parser.add_argument('--default-size-budget', help='Maximum image size for images without a budget, e.g. 2GB')
+    parser.add_argument('--logs-dir', type=Path, help='Write the full stderr of failed builds here (gzipped)')
+    parser.add_argument('--skip-preflight', action='store_true',
+                        help='Start building without checking the scripts and Dockerfiles first')
+
+
+def add_notification_arguments(group, required: bool = False):
+    """
+    Adds the options describing the Discord notification.
+    """
+    group.add_argument('--webhook-env', default='DISCORD_WEBHOOK_URL',
+                       help="Environment variable holding the course's webhook URL")
+    group.add_argument('--course-id', required=required)
+    group.add_argument('--author', required=required)
+    group.add_argument('--author-icon', required=required)
+    group.add_argument('--branch', required=required)
+    group.add_argument('--action-url', required=required)
+    group.add_argument('--cicd-id', help='CI/CD Role ID')
+
+
+def build_options(args: argparse.Namespace) -> BuildOptions:
+    options = BuildOptions(
+        size_budgets=load_size_budgets(args.size_budgets, args.default_size_budget),
+        path_rules=load_path_rules(args.path_rules),
+        skip_unchanged_pushes=not args.always_push,
+        minimize_context=args.minimize_context,
+        prefetch_concurrency=args.prefetch_concurrency,
+        max_parallel=args.max_parallel,
+        preflight=not args.skip_preflight,
+        logs_dir=args.logs_dir
+    )
+
+    if args.live_progress:
+        options.progress = LiveProgress(os.environ[args.webhook_env], NotificationInfo(
+            course_id=args.course_id,
+            author=args.author,
+            author_icon=args.author_icon,
+            branch=args.branch,
+            action_url=args.action_url,
+            cicd_id=args.cicd_id
+        ))
+
+    return options
+
+
+def cli(argv: list[str] | None = None, prog: str | None = None):
+    parser = argparse.ArgumentParser(prog=prog)
     parser.add_argument('--files')
-    parser.add_argument('--output-file', required=True)
-    parser.add_argument('--root-dir', required=True)
-    args = parser.parse_args()
+    parser.add_argument('--output-file')
+    parser.add_argument('--root-dir')
+    parser.add_argument('--fleet', help='JSON file listing several course repositories to build in one run')
+    parser.add_argument('--watch', action='store_true', help='Rebuild affected images whenever files change')
+    parser.add_argument('--watch-push', action='store_true',
+                        help='Let build scripts push in watch mode (pushes are disabled by default)')
+    add_build_arguments(parser)
+
+    live = parser.add_argument_group('live progress', 'Post a Discord message and edit it as images are built')
+    live.add_argument('--live-progress', action='store_true')
+    add_notification_arguments(live)
+    args = parser.parse_args(argv)
+
+    if not args.fleet and not args.root_dir:
+        parser.error('--root-dir is required unless --fleet is given')
+    if not args.fleet and not args.watch and not args.output_file:
+        parser.error('--output-file is required unless --watch is given')
+    if args.live_progress and (args.fleet or args.watch):
+        parser.error('--live-progress cannot be combined with --fleet or --watch')
+    if args.live_progress and not os.getenv(args.webhook_env):
+        parser.error(f'{args.webhook_env} environment variable is not set')
+
+    options = build_options(args)
+
+    if args.fleet:
+        from docker_updates.fleet import main as build_fleet
+        build_fleet(args.fleet, options)
+        return
 
-    main(files=args.files, output_file=args.output_file, root_dir=args.root_dir)
\ No newline at end of file
+    if args.watch:
+        from docker_updates.watch import watch
+        options.push = args.watch_push
+        watch(args.root_dir, options)
+        return
+
+    main(
+        files=args.files,
+        output_file=args.output_file,
+        root_dir=args.root_dir,
+        history_db=args.history_db,
+        options=options
+    )
+
+
+if __name__ == '__main__':
+    cli()
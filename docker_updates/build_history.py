@@ -0,0 +1,251 @@
+import argparse
+import hashlib
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from statistics import median
+
+'''
+SQLite history of docker build outcomes.
+
+Every build run appends one row per image. The history is used to flag
+images whose build time or size regressed against their rolling baseline,
+and images that fail intermittently (the same content both succeeded and
+failed to build).
+'''
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    image TEXT NOT NULL,
+    content_hash TEXT,
+    duration REAL NOT NULL,
+    image_size INTEGER,
+    layer_count INTEGER,
+    success INTEGER NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS builds_by_image ON builds (image, id);
+"""
+
+# Columns added after the first release, created on older databases when opened
+MIGRATIONS = {
+    'layer_count': 'ALTER TABLE builds ADD COLUMN layer_count INTEGER',
+}
+
+# Build times jitter by a few seconds; smaller increases are never reported
+MIN_DURATION_INCREASE = 10.0
+
+
+@dataclass
+class BuildRecord:
+    image: str
+    content_hash: str | None
+    duration: float
+    image_size: int | None
+    layer_count: int | None
+    success: bool
+    timestamp: str
+
+
+@dataclass
+class Regression:
+    image: str
+    metric: str
+    value: float
+    baseline: float
+
+    def describe(self) -> str:
+        if self.metric == 'duration':
+            value, baseline = f'{self.value:.1f}s', f'{self.baseline:.1f}s'
+        else:
+            value, baseline = format_size(self.value), format_size(self.baseline)
+        change = (self.value - self.baseline) / self.baseline * 100
+        return f'{self.image}: {self.metric} {value} vs {baseline} baseline (+{change:.0f}%)'
+
+
+def format_size(size: float) -> str:
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f'{size:.0f}{unit}'
+        size /= 1024
+    return f'{size:.1f}GB'
+
+
+def hash_build_context(directory: Path) -> str:
+    """
+    Hashes the relative paths and contents of every file in a directory.
+
+    :param directory: The build context (the build script's folder)
+    :return: A hex sha256 digest
+    """
+    digest = hashlib.sha256()
+    for file in sorted(p for p in directory.rglob('*') if p.is_file()):
+        digest.update(file.relative_to(directory).as_posix().encode())
+        digest.update(b'\0')
+        with open(file, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def open_history(db_path: str | Path) -> sqlite3.Connection:
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(db_path)
+    connection.executescript(SCHEMA)
+
+    columns = {row[1] for row in connection.execute('PRAGMA table_info(builds)')}
+    for column, statement in MIGRATIONS.items():
+        if column not in columns:
+            connection.execute(statement)
+
+    return connection
+
+
+def now_timestamp() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+def record_builds(connection: sqlite3.Connection, records: list[BuildRecord]):
+    with connection:
+        connection.executemany(
+            'INSERT INTO builds (image, content_hash, duration, image_size, layer_count, success, timestamp) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [
+                (r.image, r.content_hash, r.duration, r.image_size, r.layer_count, int(r.success), r.timestamp)
+                for r in records
+            ]
+        )
+
+
+def recent_builds(connection: sqlite3.Connection, image: str, limit: int) -> list[BuildRecord]:
+    """
+    Gets the most recent builds of an image, newest first.
+    """
+    rows = connection.execute(
+        'SELECT image, content_hash, duration, image_size, layer_count, success, timestamp '
+        'FROM builds WHERE image = ? ORDER BY id DESC LIMIT ?',
+        (image, limit)
+    ).fetchall()
+    return [
+        BuildRecord(image, content_hash, duration, image_size, layer_count, bool(success), timestamp)
+        for image, content_hash, duration, image_size, layer_count, success, timestamp in rows
+    ]
+
+
+def last_successful_build(connection: sqlite3.Connection, image: str) -> BuildRecord | None:
+    row = connection.execute(
+        'SELECT image, content_hash, duration, image_size, layer_count, success, timestamp '
+        'FROM builds WHERE image = ? AND success = 1 ORDER BY id DESC LIMIT 1',
+        (image,)
+    ).fetchone()
+    if row is None:
+        return None
+
+    image, content_hash, duration, image_size, layer_count, success, timestamp = row
+    return BuildRecord(image, content_hash, duration, image_size, layer_count, bool(success), timestamp)
+
+
+def known_images(connection: sqlite3.Connection) -> list[str]:
+    return [row[0] for row in connection.execute('SELECT DISTINCT image FROM builds ORDER BY image')]
+
+
+def find_regressions(
+        connection: sqlite3.Connection,
+        images: list[str] | None = None,
+        threshold: float = 0.25,
+        window: int = 5
+) -> list[Regression]:
+    """
+    Compares the latest build of each image, if it succeeded, with the
+    median of the successful builds before it. Images whose latest build
+    failed are skipped, so an old regression is not reported again.
+
+    :param images: The images to check (defaults to every image in the history)
+    :param threshold: Relative increase that counts as a regression (0.25 = 25%)
+    :param window: Number of previous successful builds in the baseline
+    """
+    regressions = []
+    for image in images if images is not None else known_images(connection):
+        recent = recent_builds(connection, image, window * 4)
+        if not recent or not recent[0].success:
+            continue
+
+        builds = [b for b in recent if b.success]
+        if len(builds) < 2:
+            continue
+
+        latest, previous = builds[0], builds[1:window + 1]
+        for metric in ('duration', 'image_size'):
+            value = getattr(latest, metric)
+            history = [getattr(b, metric) for b in previous if getattr(b, metric)]
+            if not value or not history:
+                continue
+
+            baseline = median(history)
+            if metric == 'duration' and value - baseline < MIN_DURATION_INCREASE:
+                continue
+            if value > baseline * (1 + threshold):
+                regressions.append(Regression(image, metric, value, baseline))
+
+    return regressions
+
+
+def find_flaky_images(
+        connection: sqlite3.Connection,
+        images: list[str] | None = None,
+        window: int = 10
+) -> list[str]:
+    """
+    Finds images whose recent builds both succeeded and failed for the same
+    build context, i.e. failures that were not caused by a change.
+
+    :param images: The images to check (defaults to every image in the history)
+    :param window: Number of recent builds to consider per image
+    """
+    flaky = []
+    for image in images if images is not None else known_images(connection):
+        outcomes: dict[str, set[bool]] = {}
+        for build in recent_builds(connection, image, window):
+            if build.content_hash:
+                outcomes.setdefault(build.content_hash, set()).add(build.success)
+
+        if any(len(results) == 2 for results in outcomes.values()):
+            flaky.append(image)
+
+    return flaky
+
+
+def main(db_path: str, threshold: float, window: int):
+    connection = open_history(db_path)
+
+    regressions = find_regressions(connection, threshold=threshold, window=window)
+    flaky_images = find_flaky_images(connection, window=window * 2)
+
+    print('=== Regressions ===')
+    for regression in regressions:
+        print(f'- {regression.describe()}')
+    if not regressions:
+        print('None')
+
+    print('\n=== Intermittent Failures ===')
+    for image in flaky_images:
+        print(f'- {image}')
+    if not flaky_images:
+        print('None')
+
+
+def cli(argv: list[str] | None = None, prog: str | None = None):
+    parser = argparse.ArgumentParser(prog=prog, description='Report build time/size regressions and flaky images.')
+    parser.add_argument('--db', required=True, help='Path to the build history database')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Relative increase flagged as a regression')
+    parser.add_argument('--window', type=int, default=5, help='Number of builds in the rolling baseline')
+    args = parser.parse_args(argv)
+
+    main(db_path=args.db, threshold=args.threshold, window=args.window)
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,99 @@
+import re
+import threading
+from dataclasses import dataclass
+
+'''
+Per-step timing parsed from BuildKit's plain progress output.
+
+With `--progress=plain` (the default when output is not a terminal) every
+step is printed as:
+
+#7 [stage-1 3/5] RUN pip install -r requirements.txt
+#7 0.512 Collecting numpy
+#7 DONE 12.3s
+
+or `#7 CACHED` when the layer is reused. Lines are fed as they are read
+from the build script, so scripts running several builds are handled as
+well; internal steps (loading the Dockerfile, metadata, exporting) are
+ignored.
+'''
+
+STEP_HEADER = re.compile(r'^#(\d+) \[(?:[^\]]*\s)?\d+/\d+\] (.+)$')
+STEP_STATUS = re.compile(r'^#(\d+) (?:DONE (\d+(?:\.\d+)?)s|(CACHED)|(ERROR|CANCELED)\b)')
+
+SLOWEST_STEPS = 5
+
+
+@dataclass
+class BuildStep:
+    name: str
+    duration: float = 0.0
+    cached: bool = False
+    failed: bool = False
+
+    def output(self) -> dict:
+        return {"step": self.name, "duration": self.duration}
+
+
+class StepTimer:
+    """
+    Collects the Dockerfile steps of a build from its output lines.
+    Safe to feed from the stdout and stderr readers at the same time.
+    """
+
+    def __init__(self):
+        self.steps: list[BuildStep] = []
+        self.running: dict[str, BuildStep] = {}
+        self.lock = threading.Lock()
+
+    def feed(self, line: str):
+        if not line.startswith('#'):
+            return
+
+        line = line.rstrip()
+        with self.lock:
+            header = STEP_HEADER.match(line)
+            if header:
+                number, name = header.groups()
+                if number not in self.running:
+                    self.running[number] = BuildStep(name=' '.join(name.split()))
+                return
+
+            status = STEP_STATUS.match(line)
+            if not status:
+                return
+
+            number, duration, cached, failed = status.groups()
+            step = self.running.pop(number, None)
+            if step is None:
+                return
+
+            step.duration = float(duration) if duration else 0.0
+            step.cached = cached is not None
+            step.failed = failed is not None
+            self.steps.append(step)
+
+    def summary(self, slowest: int = SLOWEST_STEPS) -> dict:
+        """
+        Summarizes the finished steps for the result JSON: the slowest
+        steps, the share of cached steps and the first step that missed
+        the cache (everything after it is rebuilt).
+        """
+        with self.lock:
+            steps = list(self.steps)
+
+        if not steps:
+            return {}
+
+        executed = [step for step in steps if not step.cached]
+        first_miss = next((step.name for step in executed), None)
+        summary = {
+            "cache_hit_ratio": round((len(steps) - len(executed)) / len(steps), 2),
+            "slowest_steps": [
+                step.output()
+                for step in sorted(executed, key=lambda step: step.duration, reverse=True)[:slowest]
+            ],
+        }
+        if first_miss is not None:
+            summary["first_cache_miss"] = first_miss
+        return summary
@@ -0,0 +1,208 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from docker_updates.build_dockers import (
+    BuildOptions, DockerBuildResult, build_docker_image, collect_docker_files,
+    record_build_history, separate_base_and_assignment_images
+)
+from docker_updates.build_history import hash_build_context
+from docker_updates.image_inspect import find_image_tag
+from docker_updates.path_rules import load_path_rules
+from docker_updates.prefetch import start_prefetch
+from docker_updates.preflight import preflight
+
+'''
+Fleet mode: build the changes of several course repositories in one run.
+
+A fleet file lists the courses:
+
+{
+    "max_parallel": 6,
+    "courses": [
+        {
+            "course_id": "235",
+            "root_dir": "cs235",
+            "files": "include/toolchain.sh hw1/solution/main.py",
+            "output_file": "logs/235_docker_output.json",
+            "path_rules": null,
+            "history_db": null
+        }
+    ]
+}
+
+The plans of all courses are merged into one schedule. Scripts that produce
+the same image tag from an identical build context are built once and
+their outcome is reported to every course that planned them. Base images
+go first, then assignment images share one concurrency limit. Each course
+gets its own docker_output.json, ready for send-notification.
+'''
+
+
+@dataclass
+class Course:
+    course_id: str
+    root: Path
+    files: str
+    output_file: Path
+    path_rules: str | None = None
+    history_db: str | None = None
+    docker_scripts: set[Path] = field(default_factory=set)
+    result: DockerBuildResult = field(default_factory=DockerBuildResult)
+
+    @staticmethod
+    def from_dict(data: dict) -> 'Course':
+        files = data.get('files', '')
+        return Course(
+            course_id=str(data['course_id']),
+            root=Path(data['root_dir']).resolve(),
+            files=' '.join(files) if isinstance(files, list) else files,
+            output_file=Path(data['output_file']),
+            path_rules=data.get('path_rules'),
+            history_db=data.get('history_db'),
+        )
+
+
+@dataclass
+class FleetBuild:
+    """
+    One build in the merged schedule and the course scripts it stands for.
+    """
+    docker_script: Path
+    owners: list[tuple[Course, Path]] = field(default_factory=list)
+    result: DockerBuildResult = field(default_factory=DockerBuildResult)
+
+
+def build_key(docker_script: Path) -> tuple[str, str]:
+    image = find_image_tag(docker_script) or str(docker_script)
+    return image, hash_build_context(docker_script.parent)
+
+
+def plan_fleet(courses: list[Course]) -> list[FleetBuild]:
+    """
+    Collects each course's scripts and merges duplicates across courses.
+    A course that cannot be planned gets the error in its result and
+    builds nothing; the other courses are unaffected.
+    """
+    builds: dict[tuple[str, str], FleetBuild] = {}
+    for course in courses:
+        try:
+            docker_scripts = collect_docker_files(course.files, course.root, load_path_rules(course.path_rules))
+            keys = {docker_script: build_key(docker_script) for docker_script in docker_scripts}
+        except Exception as e:
+            course.result.add_error_message(f"Planning failed: {e}")
+            print(f"✗ Error planning CS {course.course_id}: {e}")
+            continue
+
+        course.docker_scripts = docker_scripts
+        for docker_script, key in keys.items():
+            build = builds.setdefault(key, FleetBuild(docker_script))
+            build.owners.append((course, docker_script))
+
+    return list(builds.values())
+
+
+def report_to_owners(build: FleetBuild):
+    """
+    Copies the outcome of a shared build into the result of every course
+    that planned it, under that course's own script name.
+    """
+    name = build.docker_script.name
+    outcome = build.result
+    for course, docker_script in build.owners:
+        if name in outcome.updated_images:
+            course.result.add_updated_image(docker_script)
+        if name in outcome.unchanged_images:
+            course.result.add_unchanged_image(docker_script)
+        if name in outcome.failed_images:
+            course.result.add_failed_image(docker_script)
+        if name in outcome.over_budget_images:
+            course.result.add_over_budget_image(docker_script)
+        if name in outcome.image_details:
+            course.result.add_image_details(docker_script, **outcome.image_details[name])
+            if len(build.owners) > 1:
+                course.result.add_image_details(
+                    docker_script,
+                    shared_with=[owner.course_id for owner, _ in build.owners if owner is not course]
+                )
+
+
+def run_fleet(builds: list[FleetBuild], options: BuildOptions):
+    by_script = {build.docker_script: build for build in builds}
+    failures = preflight(set(by_script)) if options.preflight else {}
+    for docker_script, errors in sorted(failures.items()):
+        build = by_script[docker_script]
+        build.result.add_failed_image(docker_script)
+        build.result.add_image_details(docker_script, preflight=errors)
+        report_to_owners(build)
+        print(f"✗ Preflight failed: {docker_script.name}")
+        for error in errors:
+            print(f"  - {error}")
+
+    base_images, assignment_images = separate_base_and_assignment_images(set(by_script) - failures.keys())
+
+    def build_one(docker_script: Path):
+        build = by_script[docker_script]
+        try:
+            build_docker_image(docker_script, build.result, options)
+        except Exception as e:
+            build.result.add_failed_image(docker_script)
+            print(f"✗ Error building {docker_script}: {e}")
+        report_to_owners(build)
+
+    if base_images:
+        print(f"\n=== Building {len(base_images)} base image(s) first ===")
+        for docker_script in base_images:
+            build_one(docker_script)
+
+    if assignment_images:
+        print(f"\n=== Building {len(assignment_images)} assignment image(s) ===")
+        with ThreadPoolExecutor(max_workers=options.max_parallel or len(assignment_images)) as executor:
+            list(executor.map(build_one, assignment_images))
+
+
+def main(fleet_file: str, options: BuildOptions | None = None):
+    options = options or BuildOptions()
+
+    with open(fleet_file, 'r') as f:
+        fleet = json.load(f)
+
+    courses = [Course.from_dict(course) for course in fleet['courses']]
+    if fleet.get('max_parallel') and not options.max_parallel:
+        options.max_parallel = fleet['max_parallel']
+
+    builds = plan_fleet(courses)
+    planned = sum(len(course.docker_scripts) for course in courses)
+    print(f"Fleet of {len(courses)} course(s): {planned} planned image(s), {len(builds)} after deduplication")
+
+    options.prefetcher = start_prefetch({build.docker_script for build in builds}, options.prefetch_concurrency)
+
+    try:
+        run_fleet(builds, options)
+    except Exception as e:
+        for course in courses:
+            if not course.result.error:
+                course.result.add_error_message(str(e))
+        print(f"Error during fleet build: {e}")
+    finally:
+        if options.prefetcher:
+            options.prefetcher.shutdown()
+
+    print("\n=== Fleet Summary ===")
+    for course in courses:
+        if course.history_db:
+            try:
+                record_build_history(course.history_db, course.docker_scripts, course.result)
+            except Exception as e:
+                print(f"Failed to update build history for CS {course.course_id}: {e}")
+
+        course.output_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(course.output_file, 'w') as f:
+            f.write(json.dumps(course.result.output(), indent=4))
+
+        print(
+            f"CS {course.course_id}: {len(course.result.updated_images)} updated, "
+            f"{len(course.result.unchanged_images)} unchanged, "
+            f"{len(course.result.failed_images)} failed -> {course.output_file}"
+        )
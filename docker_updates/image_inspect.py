@@ -0,0 +1,184 @@
+import fnmatch
+import json
+import os
+import re
+import subprocess
+from dataclasses import dataclass, field
+from pathlib import Path
+
+'''
+Helpers for finding out which image a build script produces and inspecting
+that image with the docker CLI after it has been built.
+
+The CLI is taken from $DOCKER (defaulting to `docker` on the PATH), so the
+inspection can be exercised with a stub executable.
+'''
+
+TAG_PATTERN = re.compile(r'(?:^|\s)(?:-t|--tag)(?:\s+|=)(["\']?)([^\s"\']+)\1')
+ASSIGNMENT_PATTERN = re.compile(
+    r'^\s*(?:export\s+)?([A-Za-z_][A-Za-z0-9_]*)=(["\']?)([^"\'\s]*)\2\s*$',
+    re.MULTILINE
+)
+VARIABLE_PATTERN = re.compile(r'\$\{([A-Za-z_][A-Za-z0-9_]*)\}|\$([A-Za-z_][A-Za-z0-9_]*)')
+SIZE_PATTERN = re.compile(r'^\s*([\d.]+)\s*([KMG]?B)?\s*$', re.IGNORECASE)
+SIZE_UNITS = {'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+# Number of layers listed in the "largest layers" report
+LARGEST_LAYER_COUNT = 3
+
+
+@dataclass
+class ImageAnalysis:
+    size: int
+    layer_count: int
+    largest_layers: list[tuple[int, str]] = field(default_factory=list)
+
+    def output(self) -> dict:
+        return {
+            "size": self.size,
+            "layer_count": self.layer_count,
+            "largest_layers": [
+                {"size": size, "created_by": created_by}
+                for size, created_by in self.largest_layers
+            ],
+        }
+
+
+@dataclass
+class SizeBudgets:
+    """
+    Maximum image sizes in bytes, keyed by build script name or glob.
+    """
+    budgets: dict[str, int] = field(default_factory=dict)
+    default: int | None = None
+
+    def budget_for(self, docker_script: Path) -> int | None:
+        if docker_script.name in self.budgets:
+            return self.budgets[docker_script.name]
+        for pattern, budget in self.budgets.items():
+            if fnmatch.fnmatch(docker_script.name, pattern):
+                return budget
+        return self.default
+
+
+def docker_executable() -> str:
+    return os.environ.get('DOCKER', 'docker')
+
+
+def run_docker(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [docker_executable(), *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True
+    )
+
+
+def expand_variables(value: str, variables: dict[str, str]) -> str | None:
+    """
+    Expands $VAR and ${VAR} references using the given variables.
+
+    :return: The expanded string, or None if a variable is undefined
+    """
+    unresolved = False
+
+    def substitute(match: re.Match) -> str:
+        nonlocal unresolved
+        name = match.group(1) or match.group(2)
+        if name not in variables:
+            unresolved = True
+            return ''
+        return variables[name]
+
+    expanded = VARIABLE_PATTERN.sub(substitute, value)
+    return None if unresolved else expanded
+
+
+def find_image_tag(docker_script: Path) -> str | None:
+    """
+    Finds the image tag a build script produces by reading its `-t`/`--tag`
+    argument. Simple shell variables assigned in the script are expanded.
+
+    :param docker_script: Path to the docker build script
+    :return: The image reference, or None if it cannot be determined
+    """
+    try:
+        script = docker_script.read_text()
+    except OSError:
+        return None
+
+    variables = {}
+    for name, _, value in ASSIGNMENT_PATTERN.findall(script):
+        expanded = expand_variables(value, variables)
+        if expanded is not None:
+            variables[name] = expanded
+
+    for _, tag in TAG_PATTERN.findall(script):
+        expanded = expand_variables(tag, variables)
+        if expanded:
+            return expanded
+
+    return None
+
+
+def parse_size(value: str | int) -> int:
+    """
+    Parses a size such as "1.5GB", "800 MB" or a plain number of bytes.
+    """
+    if isinstance(value, int):
+        return value
+
+    match = SIZE_PATTERN.match(value)
+    if not match:
+        raise ValueError(f"Invalid size: {value!r}")
+
+    number, unit = match.groups()
+    return int(float(number) * SIZE_UNITS[(unit or 'B').upper()])
+
+
+def load_size_budgets(budget_file: str | None, default_budget: str | None = None) -> SizeBudgets:
+    """
+    Loads size budgets from a JSON file mapping script names (or globs) to
+    sizes, e.g. {"default": "2GB", "build-hw1-docker.sh": "1.2GB"}.
+
+    :param budget_file: Path to the budgets file, if any
+    :param default_budget: Budget for images not listed in the file
+    """
+    budgets = {}
+    if budget_file:
+        with open(budget_file, 'r') as f:
+            budgets = {name: parse_size(size) for name, size in json.load(f).items()}
+
+    default = budgets.pop('default', None)
+    if default_budget:
+        default = parse_size(default_budget)
+
+    return SizeBudgets(budgets=budgets, default=default)
+
+
+def analyze_image(image: str) -> ImageAnalysis | None:
+    """
+    Inspects a local image for its total size, layer count and largest layers.
+
+    :param image: The image reference
+    :return: The analysis, or None if the image is not in the local store
+    """
+    process = run_docker('image', 'inspect', '--format', '{{.Size}} {{len .RootFS.Layers}}', image)
+    if process.returncode != 0:
+        return None
+
+    try:
+        size, layer_count = (int(value) for value in process.stdout.split())
+    except ValueError:
+        return None
+
+    layers = []
+    process = run_docker('history', '--human=false', '--no-trunc', '--format', '{{.Size}}\t{{.CreatedBy}}', image)
+    if process.returncode == 0:
+        for line in process.stdout.splitlines():
+            layer_size, _, created_by = line.partition('\t')
+            if layer_size.isdigit() and int(layer_size) > 0:
+                layers.append((int(layer_size), ' '.join(created_by.split())[:120]))
+
+    layers.sort(key=lambda layer: layer[0], reverse=True)
+    return ImageAnalysis(size=size, layer_count=layer_count, largest_layers=layers[:LARGEST_LAYER_COUNT])
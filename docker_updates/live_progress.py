@@ -0,0 +1,216 @@
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+from course_updates.docker_notification import docker_format, requires_docker_review
+from course_updates.send_course_notification import build_webhook_payload, generate_field, space
+from course_updates.webhook import edit_webhook_message, execute_webhook, execute_webhook_with_files
+
+'''
+Live build progress in a single Discord message.
+
+One message is posted when the build plan is known and edited in place as
+images are queued, start, finish or fail. Edits are throttled to one every
+`min_interval` seconds (intermediate states are coalesced), and a 429
+response is retried after Discord's `retry_after`. The last edit
+replaces the progress with the normal docker_format summary. Attachments
+cannot be added by an edit, so the logs of failed builds follow in a
+separate message.
+
+Discord failures are reported but never interrupt the builds.
+'''
+
+QUEUED = 'queued'
+BUILDING = 'building'
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+FAILED = 'failed'
+
+MAX_ATTEMPTS = 3
+
+STATUS_LABELS = {
+    BUILDING: '**Building:**',
+    QUEUED: '**Queued:**',
+    UPDATED: '**Updated:**',
+    UNCHANGED: '**Unchanged:**',
+    FAILED: '**Failed:**',
+}
+
+
+@dataclass
+class NotificationInfo:
+    course_id: str
+    author: str
+    author_icon: str
+    branch: str
+    action_url: str
+    cicd_id: str | None = None
+
+
+class LiveProgress:
+    def __init__(self, webhook_url: str, info: NotificationInfo, min_interval: float = 2.0):
+        self.webhook_url = webhook_url
+        self.info = info
+        self.min_interval = min_interval
+
+        self.message_id: str | None = None
+        self.summary_sent = False
+        self.statuses: dict[str, str] = {}
+        self.started = time.monotonic()
+        self.next_edit = 0.0
+
+        self.condition = threading.Condition()
+        self.dirty = False
+        self.closed = False
+        self.flusher: threading.Thread | None = None
+
+    def queued(self, docker_scripts: list[Path]):
+        """
+        Posts the progress message for the planned builds.
+        """
+        with self.condition:
+            for docker_script in docker_scripts:
+                self.statuses.setdefault(docker_script.name, QUEUED)
+
+        response = self.send(self.progress_payload(), edit=False, params={"wait": "true"})
+        if response is None or response.status_code >= 400:
+            return
+
+        self.message_id = (response.json() or {}).get("id")
+        self.next_edit = time.monotonic() + self.min_interval
+        self.flusher = threading.Thread(target=self.flush_edits, name='live-progress', daemon=True)
+        self.flusher.start()
+
+    def update(self, docker_script: Path, status: str):
+        with self.condition:
+            self.statuses[docker_script.name] = status
+            self.dirty = True
+            self.condition.notify()
+
+    def finish(self, data: dict):
+        """
+        Stops the progress edits and replaces the message with the summary.
+
+        :param data: The build output, as written to docker_output.json
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        if self.flusher:
+            self.flusher.join()
+
+        if self.message_id is None:
+            return
+
+        notification = docker_format(
+            data=data,
+            course_id=self.info.course_id,
+            author=self.info.author,
+            author_icon=self.info.author_icon,
+            branch=self.info.branch,
+            action_url=self.info.action_url,
+        )
+        requires_review = bool(requires_docker_review(data))
+        self.wait_for_rate_limit()
+        response = self.send(build_webhook_payload(notification, requires_review, self.info.cicd_id))
+        self.summary_sent = response is not None and response.status_code < 400
+
+        # Mentions added by an edit do not notify anyone
+        if requires_review and self.info.cicd_id:
+            self.send({"content": f"<@&{self.info.cicd_id}> Docker builds need review"}, edit=False)
+
+    def send_logs(self, logs: list[Path]) -> bool:
+        """
+        Posts the full logs of the failed builds after the summary.
+
+        :return: True if Discord accepted the message
+        """
+        response = self.send({"content": "Full logs of the failed builds:"}, edit=False, files=logs)
+        return response is not None and response.status_code < 400
+
+    def flush_edits(self):
+        while True:
+            with self.condition:
+                while not self.dirty and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+
+            self.wait_for_rate_limit()
+            with self.condition:
+                if self.closed:
+                    return
+                self.dirty = False
+                payload = self.progress_payload()
+            self.send(payload)
+
+    def wait_for_rate_limit(self):
+        delay = self.next_edit - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def send(self, payload: dict, edit: bool = True, params: dict | None = None, files: list[Path] | None = None):
+        """
+        Edits the progress message (or posts a new one, with optional files)
+        and schedules the earliest time of the next edit.
+        """
+        for _ in range(MAX_ATTEMPTS):
+            try:
+                if edit:
+                    response = edit_webhook_message(self.webhook_url, self.message_id, payload)
+                elif files:
+                    response = execute_webhook_with_files(self.webhook_url, payload, files, params=params)
+                else:
+                    response = execute_webhook(self.webhook_url, payload, params=params)
+            except Exception as e:
+                print(f"Could not update the live progress message: {e}")
+                return None
+
+            if response.status_code != 429:
+                break
+            time.sleep(float((response.json() or {}).get("retry_after", self.min_interval)))
+
+        if response.status_code >= 400:
+            print(f"Discord returned status {response.status_code}: {response.text}")
+        self.next_edit = time.monotonic() + self.min_interval
+        return response
+
+    def progress_payload(self) -> dict:
+        by_status = {status: [] for status in STATUS_LABELS}
+        for name, status in sorted(self.statuses.items()):
+            by_status[status].append(name)
+
+        done = len(by_status[UPDATED]) + len(by_status[UNCHANGED]) + len(by_status[FAILED])
+        elapsed = int(time.monotonic() - self.started)
+
+        fields = [space()]
+        for status, label in STATUS_LABELS.items():
+            if by_status[status]:
+                fields += generate_field(
+                    name=label,
+                    value='\n'.join(f'- {name}' for name in by_status[status]),
+                    inline=True
+                )
+        fields += [
+            space(),
+            *generate_field(name='**GitHub Action:**', value=f'[View here]({self.info.action_url})'),
+        ]
+
+        return build_webhook_payload({
+            "username": "Gradescope Notifications",
+            "avatar_url": "https://tinyurl.com/mr2fyjse",
+            "embeds": [{
+                "author": {"name": self.info.author, "icon_url": self.info.author_icon},
+                "title": f"CS {self.info.course_id} - Docker Updates (in progress)",
+                "description": f'**`{self.info.branch}`**\n{done}/{len(self.statuses)} image(s) done, {elapsed}s elapsed',
+                "color": 16763904,
+                "fields": fields,
+                "timestamp": datetime.now().isoformat(),
+                "footer": {
+                    "text": "Docker GitHub Action",
+                    "icon_url": "https://tinyurl.com/32ffdfss"
+                }
+            }]
+        }, requires_review=False)
@@ -0,0 +1,327 @@
+import fnmatch
+import json
+import re
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+
+'''
+Declarative rules mapping a changed file to the assignment folder it belongs to.
+
+A rules file is JSON:
+
+{
+    "rules": [
+        {"pattern": "labs/*/tests/**", "depth": 2},
+        {"pattern": "**/*solution*/*", "up": 2},
+        {"pattern": "projects/**/data/**", "anchor": "project*"}
+    ],
+    "defaults": true
+}
+
+`pattern` is a glob over the path's components (`*` and `?` stay within one
+component, `**` matches any number of components). The first rule that
+matches decides the assignment folder, which is either:
+
+- `up`: the file's N-th ancestor (1 is the folder containing the file)
+- `depth`: the first N components of the path (relative to the repo root)
+- `anchor`: the nearest ancestor whose name matches the given glob
+
+With `"defaults": true` the built-in rules are tried after the listed ones.
+
+All patterns are compiled into one automaton over path components, built
+lazily, so classifying a path costs at most one regex match per component
+no matter how many rules there are, and a dictionary lookup for folders
+seen before.
+'''
+
+# Equivalent to the original hard-coded heuristics of find_assignments
+DEFAULT_RULES = [
+    {"pattern": "**/*solution*/*", "up": 2},
+    {"pattern": "**/*worlds*/*", "up": 3},
+    {"pattern": "**/*test_files*/*", "up": 3},
+    {"pattern": "**/*activities*", "up": 1},
+]
+
+ANY_COMPONENTS = '**'
+
+
+@dataclass(frozen=True)
+class PathRule:
+    pattern: str
+    up: int | None = None
+    depth: int | None = None
+    anchor: str | None = None
+
+    @staticmethod
+    def from_dict(data: dict) -> 'PathRule':
+        targets = [key for key in ('up', 'depth', 'anchor') if key in data]
+        if 'pattern' not in data or len(targets) != 1:
+            raise ValueError(f"Rule needs a pattern and exactly one of up/depth/anchor: {data}")
+        return PathRule(
+            pattern=data['pattern'],
+            up=data.get('up'),
+            depth=data.get('depth'),
+            anchor=data.get('anchor')
+        )
+
+    def assignment_root(self, components: list[str]) -> list[str] | None:
+        """
+        Picks the assignment folder out of a matched path.
+
+        :param components: The components of the matched path
+        :return: The components of the assignment folder, or None
+        """
+        if self.up is not None:
+            return components[:-self.up] if self.up <= len(components) else None
+
+        if self.depth is not None:
+            return components[:self.depth] if self.depth < len(components) else None
+
+        for index in range(len(components) - 2, -1, -1):
+            if fnmatch.fnmatchcase(components[index], self.anchor):
+                return components[:index + 1]
+        return None
+
+
+def segment_regex(segment: str) -> str:
+    """
+    Translates a glob over one path component into a regular expression
+    without capturing groups, so it can be combined with others.
+    """
+    regex = ''
+    i = 0
+    while i < len(segment):
+        char = segment[i]
+        if char == '*':
+            regex += '.*'
+        elif char == '?':
+            regex += '.'
+        elif char == '[':
+            end = segment.find(']', i + 2 if segment[i + 1:i + 2] in ('!', ']') else i + 1)
+            if end == -1:
+                regex += re.escape(char)
+            else:
+                chars = segment[i + 1:end].replace('\\', '\\\\')
+                if chars.startswith('!'):
+                    chars = '^' + chars[1:]
+                elif chars.startswith('^'):
+                    chars = '\\' + chars
+                regex += f'[{chars}]'
+                i = end
+        else:
+            regex += re.escape(char)
+        i += 1
+    return regex
+
+
+class PathRules:
+    """
+    An ordered list of rules compiled into a single lazily determinized
+    automaton over path components.
+
+    NFA states are (rule index, segment index) pairs. A DFA state is the
+    frozenset of NFA states reachable after the components seen so far.
+    Each DFA state compiles the globs it can advance on into one regex of
+    optional lookaheads, so a component is matched once per state whatever
+    the number of rules, and the groups that matched select the next state.
+    Folder transitions are also cached by name, since folders repeat across
+    changed files.
+
+    The last component (the file name) is usually unique, so it is neither
+    cached nor stepped through: each state has an alternation of the globs
+    that would finish a rule, ordered by rule, and the alternative that
+    matches is the winning rule.
+    """
+
+    def __init__(self, rules: list[PathRule]):
+        self.rules = rules
+        self.segments = [
+            [segment for segment in rule.pattern.strip('/').split('/') if segment]
+            for rule in rules
+        ]
+        self.regexes = [
+            [None if segment == ANY_COMPONENTS else segment_regex(segment) for segment in segments]
+            for segments in self.segments
+        ]
+        # finishes[rule][index]: the rule matches once it reaches segment `index`
+        self.finishes = [
+            [all(segment == ANY_COMPONENTS for segment in segments[index:]) for index in range(len(segments) + 1)]
+            for segments in self.segments
+        ]
+
+        self.states: list[frozenset] = []
+        self.state_ids: dict[frozenset, int] = {}
+        self.accepting: list[int | None] = []
+        # Per state: (combined regex, the NFA states each group advances), next state by matched groups
+        self.steppers: dict[int, tuple[re.Pattern, list[list[tuple[int, int]]]]] = {}
+        self.by_groups: dict[tuple[int, tuple[int, ...]], int] = {}
+        self.transitions: dict[tuple[int, str], int] = {}
+        self.finishers: dict[int, tuple[re.Pattern, list[int]] | None] = {}
+
+        self.start = self.state_id(self.closure(
+            (rule, 0) for rule in range(len(rules))
+        ))
+
+    def closure(self, states) -> frozenset:
+        """
+        Adds the states reachable by letting `**` match zero components.
+        """
+        result = set()
+        stack = list(states)
+        while stack:
+            rule, index = stack.pop()
+            if (rule, index) in result:
+                continue
+            result.add((rule, index))
+            if index < len(self.segments[rule]) and self.segments[rule][index] == ANY_COMPONENTS:
+                stack.append((rule, index + 1))
+        return frozenset(result)
+
+    def state_id(self, states: frozenset) -> int:
+        if states not in self.state_ids:
+            self.state_ids[states] = len(self.states)
+            self.states.append(states)
+            finished = [rule for rule, index in states if index == len(self.segments[rule])]
+            self.accepting.append(min(finished) if finished else None)
+        return self.state_ids[states]
+
+    def stepper(self, state: int) -> tuple[re.Pattern, list[list[tuple[int, int]]]]:
+        """
+        Compiles the distinct globs a state can advance on into one regex
+        with a capturing lookahead per glob.
+        """
+        stepper = self.steppers.get(state)
+        if stepper is None:
+            advances: dict[str, list[tuple[int, int]]] = {}
+            for rule, index in sorted(self.states[state]):
+                regex = self.regexes[rule][index] if index < len(self.segments[rule]) else None
+                if regex is not None:
+                    advances.setdefault(regex, []).append((rule, index + 1))
+
+            combined = ''.join(f'(?:(?=(?P<g{group}>{regex})\\Z))?' for group, regex in enumerate(advances))
+            stepper = self.steppers[state] = (re.compile(combined, re.DOTALL), list(advances.values()))
+        return stepper
+
+    def step(self, state: int, component: str) -> int:
+        regex, advances = self.stepper(state)
+        groups = tuple(
+            group for group, matched in enumerate(regex.match(component).groups())
+            if matched is not None
+        )
+
+        key = (state, groups)
+        next_state = self.by_groups.get(key)
+        if next_state is None:
+            reachable = [
+                (rule, index) for rule, index in self.states[state]
+                if index < len(self.segments[rule]) and self.regexes[rule][index] is None
+            ]
+            for group in groups:
+                reachable.extend(advances[group])
+            next_state = self.by_groups[key] = self.state_id(self.closure(reachable))
+        return next_state
+
+    def finisher(self, state: int) -> tuple[re.Pattern, list[int]] | None:
+        """
+        Compiles an alternation of the globs that finish a rule from this
+        state, in rule order, so the first alternative matching a file name
+        is the rule that applies.
+
+        :return: The alternation and the rule of each alternative, or None
+            if no rule can finish from this state
+        """
+        if state not in self.finishers:
+            alternatives = {}
+            for rule, index in sorted(self.states[state]):
+                if index == len(self.segments[rule]):
+                    continue
+                regex = self.regexes[rule][index]
+                if regex is None:
+                    # `**` consumes the name and stays put
+                    regex, finished = '.*', self.finishes[rule][index]
+                else:
+                    finished = self.finishes[rule][index + 1]
+                if finished:
+                    alternatives.setdefault(regex, rule)
+
+            self.finishers[state] = (
+                re.compile('|'.join(f'({regex})\\Z' for regex in alternatives), re.DOTALL),
+                list(alternatives.values())
+            ) if alternatives else None
+        return self.finishers[state]
+
+    def match(self, components: list[str]) -> PathRule | None:
+        """
+        Finds the first rule whose pattern matches the whole path.
+        """
+        if not components:
+            rule = self.accepting[self.start]
+            return self.rules[rule] if rule is not None else None
+
+        state = self.start
+        transitions = self.transitions
+        for component in components[:-1]:
+            next_state = transitions.get((state, component))
+            if next_state is None:
+                next_state = transitions[(state, component)] = self.step(state, component)
+            state = next_state
+
+        finisher = self.finisher(state)
+        if finisher is None:
+            return None
+
+        regex, rules = finisher
+        match = regex.match(components[-1])
+        return self.rules[rules[match.lastindex - 1]] if match else None
+
+    def assignment_roots(self, files: list[Path], root: Path | None = None) -> set[Path]:
+        """
+        Maps changed files to the assignment folders they belong to.
+
+        :param files: The changed files
+        :param root: The repository root; patterns are matched relative to it
+        :return: The set of assignment folders (files matching no rule are ignored)
+        """
+        prefix = str(root).rstrip('/') + '/' if root is not None else None
+
+        assignments = set()
+        for file in files:
+            path = str(file)
+            if prefix and path.startswith(prefix):
+                base, relative = prefix, path[len(prefix):]
+            else:
+                base, relative = ('/' if path.startswith('/') else ''), path.lstrip('/')
+
+            components = [component for component in relative.split('/') if component]
+            rule = self.match(components)
+            if rule is None:
+                continue
+
+            assignment = rule.assignment_root(components)
+            if assignment is not None:
+                assignments.add(base + '/'.join(assignment))
+
+        return {Path(assignment) for assignment in assignments}
+
+
+@cache
+def default_path_rules() -> PathRules:
+    return PathRules([PathRule.from_dict(rule) for rule in DEFAULT_RULES])
+
+
+def load_path_rules(rules_file: str | None) -> PathRules:
+    """
+    Loads and compiles a rules file, or the default rules if none is given.
+    """
+    if not rules_file:
+        return default_path_rules()
+
+    with open(rules_file, 'r') as f:
+        data = json.load(f)
+
+    rules = [PathRule.from_dict(rule) for rule in data.get('rules', [])]
+    if data.get('defaults', False):
+        rules += [PathRule.from_dict(rule) for rule in DEFAULT_RULES]
+
+    return PathRules(rules)
@@ -0,0 +1,180 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import traceback
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+from course_updates.create_fallback import fallback_output, is_valid_output
+from course_updates.log_attachments import failed_image_logs, limit_attachments
+from course_updates.send_course_notification import send_notification
+from docker_updates.build_dockers import (
+    add_build_arguments, add_notification_arguments, build_options, main as build_dockers
+)
+
+'''
+The whole docker workflow in one process: change detection, building,
+fallback output and the Discord notification.
+
+This replaces running build-dockers, create-fallback and send-notification
+as separate steps. The build's stdout and stderr still go to the console,
+but their last lines are also kept in memory, so a fallback can be written
+without capturing the logs to files. docker_output.json is written as
+before.
+
+A notification is always attempted. If the build stage crashes, the
+notification reports the crash with the tail of the build's output. With
+--live-progress the logs of failed builds are posted after the summary.
+'''
+
+TAIL_LINES = 200
+
+
+class LogTail:
+    """
+    Passes writes through to a stream and keeps the last lines in memory.
+    """
+
+    def __init__(self, stream, max_lines: int = TAIL_LINES):
+        self.stream = stream
+        self.lines = deque(maxlen=max_lines)
+        self.partial = ''
+        self.lock = threading.Lock()
+
+    def write(self, text: str) -> int:
+        with self.lock:
+            self.stream.write(text)
+            lines = (self.partial + text).split('\n')
+            self.partial = lines.pop()
+            self.lines.extend(lines)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def text(self) -> str | None:
+        with self.lock:
+            content = '\n'.join([*self.lines, self.partial]).strip()
+        return content or None
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+@contextmanager
+def capture_tails(max_lines: int = TAIL_LINES):
+    """
+    Tees sys.stdout and sys.stderr into LogTails for the duration of the block.
+    """
+    stdout, stderr = LogTail(sys.stdout, max_lines), LogTail(sys.stderr, max_lines)
+    sys.stdout, sys.stderr = stdout, stderr
+    try:
+        yield stdout, stderr
+    finally:
+        sys.stdout, sys.stderr = stdout.stream, stderr.stream
+
+
+def changed_files(root_dir: str, before: str | None, after: str | None) -> str:
+    """
+    Lists the files changed between two commits, as `git diff --name-only`.
+    """
+    process = subprocess.run(
+        ['git', 'diff', '--name-only', *filter(None, [before, after])],
+        cwd=root_dir,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"git diff failed: {process.stderr.strip()}")
+    return ' '.join(process.stdout.split())
+
+
+def run_pipeline(args: argparse.Namespace) -> int:
+    """
+    Runs the build and notifies Discord.
+
+    :return: The exit code: 1 if the build crashed or no notification could be sent
+    """
+    output_file = Path(args.output_file)
+    options = None
+    data = None
+
+    with capture_tails(args.tail_lines) as (stdout, stderr):
+        try:
+            files = args.files if args.files is not None else changed_files(args.root_dir, args.before, args.after)
+            options = build_options(args)
+            build_dockers(
+                files=files,
+                output_file=str(output_file),
+                root_dir=args.root_dir,
+                history_db=args.history_db,
+                options=options
+            )
+            with open(output_file, 'r') as f:
+                data = json.load(f)
+        except Exception:
+            traceback.print_exc()
+
+    crashed = not is_valid_output(data, 'Docker')
+    if crashed:
+        print("✗ Build stage crashed, reporting the end of its output")
+        data = fallback_output('Docker', stderr.text() or stdout.text(), args.action_url)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_file, 'w') as f:
+            json.dump(data, f, indent=2)
+
+    progress = options.progress if options else None
+    if progress and progress.message_id:
+        # The live progress message ends with the summary (or the crash)
+        if crashed:
+            progress.finish(data)
+        sent = progress.summary_sent
+
+        logs = limit_attachments(failed_image_logs(data))
+        if logs:
+            sent = progress.send_logs(logs) and sent
+    else:
+        try:
+            sent = send_notification(
+                'docker', data, args.course_id, args.author, args.author_icon, args.branch,
+                args.action_url, args.cicd_id, webhook_env=args.webhook_env
+            ) is not False
+        except Exception as e:
+            print(f"✗ Failed to send the notification: {e}")
+            sent = False
+
+    if not sent:
+        print("✗ The notification could not be sent")
+    return 1 if crashed or not sent else 0
+
+
+def cli(argv: list[str] | None = None, prog: str | None = None):
+    parser = argparse.ArgumentParser(prog=prog, description='Build the changed docker images and notify Discord.')
+    parser.add_argument('--root-dir', required=True)
+    parser.add_argument('--output-file', required=True)
+    parser.add_argument('--files', help='Changed files (default: git diff --name-only BEFORE AFTER)')
+    parser.add_argument('--before', help='Commit before the push')
+    parser.add_argument('--after', help='Commit after the push')
+    parser.add_argument('--tail-lines', type=int, default=TAIL_LINES,
+                        help='Lines of output kept to report a crashed build')
+    add_build_arguments(parser)
+
+    notification = parser.add_argument_group('notification')
+    notification.add_argument('--live-progress', action='store_true',
+                              help='Post a Discord message and edit it as images are built')
+    add_notification_arguments(notification, required=True)
+    args = parser.parse_args(argv)
+
+    if not os.getenv(args.webhook_env):
+        parser.error(f'{args.webhook_env} environment variable is not set')
+
+    sys.exit(run_pipeline(args))
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,157 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from docker_updates.build_context import dockerfile_instructions, find_dockerfile, instruction_arguments
+from docker_updates.image_inspect import find_image_tag, run_docker
+
+'''
+Background pulls of the external base images used by planned builds.
+
+Pulls start as soon as the build plan is known and run with bounded
+concurrency while the rest of the run is prepared. Each distinct image is
+pulled exactly once, and a build only waits for the pulls of its own FROM
+images. Images built by the same run are never pulled.
+
+Pulls land in the daemon's image store, which only the classic builder and
+buildx builders with the `docker` driver read. Other builders (such as the
+`docker-container` builder of docker/setup-buildx-action) pull base images
+themselves, so nothing is prefetched for them.
+'''
+
+
+def normalize_image(image: str) -> str:
+    """
+    Adds the implicit :latest tag so equal references compare equal.
+    """
+    if '@' in image or ':' in image.rsplit('/', 1)[-1]:
+        return image
+    return f'{image}:latest'
+
+
+def expand_arguments(value: str, arguments: dict[str, str]) -> str | None:
+    for name, default in arguments.items():
+        value = value.replace(f'${{{name}}}', default).replace(f'${name}', default)
+    return None if '$' in value else value
+
+
+def base_images(docker_script: Path) -> set[str]:
+    """
+    Finds the images a build script's Dockerfile starts FROM, excluding
+    earlier build stages and `scratch`. Global ARG defaults are expanded;
+    images that still depend on a variable are skipped.
+    """
+    dockerfile = find_dockerfile(docker_script)
+    if dockerfile is None:
+        return set()
+
+    arguments = {}
+    stages = set()
+    images = set()
+    for instruction, args in dockerfile_instructions(dockerfile):
+        if instruction == 'ARG' and not images and not stages:
+            name, _, default = args.partition('=')
+            if default:
+                arguments[name.strip()] = default.strip().strip('"\'')
+
+        elif instruction == 'FROM':
+            words = [word for word in instruction_arguments(args) if not word.startswith('--')]
+            if not words:
+                continue
+
+            image = expand_arguments(words[0], arguments)
+            if len(words) >= 3 and words[1].lower() == 'as':
+                stages.add(words[2].lower())
+
+            if image and image.lower() not in stages and image != 'scratch':
+                images.add(normalize_image(image))
+
+    return images
+
+
+def pull_image(image: str) -> bool:
+    print(f"Prefetching base image: {image}")
+    process = run_docker('pull', '--quiet', image)
+    if process.returncode != 0:
+        # The build will pull (and report) the image itself
+        print(f"Could not prefetch {image}: {process.stderr.strip()}")
+        return False
+    return True
+
+
+def builder_driver() -> str | None:
+    """
+    Gets the driver of the active buildx builder.
+
+    :return: The driver (e.g. "docker" or "docker-container"), or None if
+        buildx is not available
+    """
+    process = run_docker('buildx', 'inspect')
+    if process.returncode != 0:
+        return None
+
+    for line in process.stdout.splitlines():
+        key, _, value = line.partition(':')
+        if key.strip() == 'Driver':
+            return value.strip()
+    return None
+
+
+class BaseImagePrefetcher:
+    def __init__(self, max_workers: int = 4):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prefetch')
+        self.pulls: dict[str, Future] = {}
+        self.requirements: dict[Path, set[str]] = {}
+        self.lock = threading.Lock()
+
+    def prefetch(self, docker_scripts: set[Path]):
+        """
+        Starts pulling the external base images of the planned builds.
+        Returns immediately.
+        """
+        produced = {
+            normalize_image(tag)
+            for tag in (find_image_tag(script) for script in docker_scripts)
+            if tag
+        }
+
+        with self.lock:
+            for docker_script in docker_scripts:
+                images = base_images(docker_script) - produced
+                self.requirements[docker_script] = images
+                for image in images:
+                    if image not in self.pulls:
+                        self.pulls[image] = self.executor.submit(pull_image, image)
+
+    def wait_for(self, docker_script: Path):
+        """
+        Blocks until the base images of one build have been pulled.
+        """
+        with self.lock:
+            pulls = [self.pulls[image] for image in self.requirements.get(docker_script, ())]
+
+        for pull in pulls:
+            pull.result()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def start_prefetch(docker_scripts: set[Path], max_workers: int) -> BaseImagePrefetcher | None:
+    """
+    Starts prefetching the base images of the planned builds, if the active
+    builder reads the daemon's image store.
+
+    :return: The prefetcher, or None if nothing is prefetched
+    """
+    if not max_workers or not docker_scripts:
+        return None
+
+    driver = builder_driver()
+    if driver not in (None, 'docker'):
+        print(f"Not prefetching base images: the {driver} builder does not use the local image store")
+        return None
+
+    prefetcher = BaseImagePrefetcher(max_workers)
+    prefetcher.prefetch(docker_scripts)
+    return prefetcher
@@ -0,0 +1,217 @@
+import glob
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from docker_updates.build_context import (
+    HEREDOC, IgnorePatterns, context_reference, context_sources, dockerfile_instructions, dockerfile_reference
+)
+from docker_updates.image_inspect import ASSIGNMENT_PATTERN, find_image_tag
+from docker_updates.prefetch import base_images, normalize_image
+
+'''
+Static checks of every planned build, run concurrently before anything is built.
+
+For each build script this checks that bash can parse it, that its
+Dockerfile exists and only contains known instructions starting with FROM,
+and that every COPY/ADD source is in the build context passed to
+`docker build` (and not excluded by its .dockerignore). Sources are not
+checked when the context is chosen at run time or read from stdin.
+
+Build args the Dockerfile uses without a default and the script does not
+pass are only reported as warnings: docker builds them as empty strings.
+
+A failing image is dropped from the schedule together with every image
+built FROM it, so a typo fails the run in seconds instead of after the base
+images have been built.
+'''
+
+INSTRUCTIONS = {
+    'ADD', 'ARG', 'CMD', 'COPY', 'ENTRYPOINT', 'ENV', 'EXPOSE', 'FROM', 'HEALTHCHECK', 'LABEL',
+    'MAINTAINER', 'ONBUILD', 'RUN', 'SHELL', 'STOPSIGNAL', 'USER', 'VOLUME', 'WORKDIR',
+}
+
+# Set by BuildKit itself (proxies and platform arguments)
+PREDEFINED_ARGS = {
+    'HTTP_PROXY', 'HTTPS_PROXY', 'FTP_PROXY', 'NO_PROXY', 'ALL_PROXY',
+    'http_proxy', 'https_proxy', 'ftp_proxy', 'no_proxy', 'all_proxy',
+    'TARGETPLATFORM', 'TARGETOS', 'TARGETARCH', 'TARGETVARIANT',
+    'BUILDPLATFORM', 'BUILDOS', 'BUILDARCH', 'BUILDVARIANT',
+}
+
+BUILD_ARG = re.compile(r'--build-arg(?:\s+|=)(["\']?)([A-Za-z_][A-Za-z0-9_]*)(=?)')
+WILDCARD = re.compile(r'[*?\[]')
+
+
+def check_script(docker_script: Path) -> list[str]:
+    process = subprocess.run(
+        ['bash', '-n', str(docker_script)],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True
+    )
+    if process.returncode != 0:
+        return [f"script does not parse: {process.stderr.strip()}"]
+    return []
+
+
+def check_instructions(instructions: list[tuple[str, str]]) -> list[str]:
+    errors = [
+        f"unknown Dockerfile instruction: {instruction}"
+        for instruction, _ in instructions
+        if instruction not in INSTRUCTIONS
+    ]
+
+    first = next((instruction for instruction, _ in instructions if instruction != 'ARG'), None)
+    if first != 'FROM':
+        errors.append("Dockerfile does not start with FROM")
+    return errors
+
+
+def check_sources(directory: Path, dockerfile: str) -> list[str]:
+    sources = context_sources(dockerfile)
+    if sources is None:
+        return []
+
+    ignore_file = directory / '.dockerignore'
+    ignored = IgnorePatterns(ignore_file.read_text().splitlines()) if ignore_file.is_file() else None
+
+    errors = []
+    for source in sources:
+        if source in ('Dockerfile', '.dockerignore'):
+            continue
+        if WILDCARD.search(source):
+            if not glob.glob(str(directory / source)):
+                errors.append(f"no files match COPY source: {source}")
+        elif not (directory / source).exists():
+            errors.append(f"COPY source does not exist: {source}")
+        elif ignored and ignored.ignored(source):
+            errors.append(f"COPY source is excluded by .dockerignore: {source}")
+    return errors
+
+
+def unset_build_args(instructions: list[tuple[str, str]]) -> set[str]:
+    """
+    Finds the ARGs declared without a default that the Dockerfile uses
+    without a fallback (`${NAME:-default}` does not count). A stage's
+    `ARG NAME` takes the default of a global `ARG NAME=default`.
+    """
+    declared = set()
+    global_defaults = set()
+    in_stage = False
+    for instruction, arguments in instructions:
+        if instruction == 'FROM':
+            in_stage = True
+        elif instruction == 'ARG':
+            name, has_default, _ = arguments.partition('=')
+            if has_default and not in_stage:
+                global_defaults.add(name.strip())
+            elif not has_default:
+                declared.add(name.strip())
+
+    used = set()
+    for instruction, arguments in instructions:
+        if instruction == 'ARG':
+            continue
+        for name in declared - global_defaults:
+            if re.search(rf'\$(?:{name}\b|\{{{name}\}})', arguments):
+                used.add(name)
+
+    return used - PREDEFINED_ARGS
+
+
+def missing_build_args(script: str, instructions: list[tuple[str, str]]) -> list[str]:
+    """
+    Finds the build args the Dockerfile needs that the script does not pass.
+    """
+    assigned = {match.group(1) for match in ASSIGNMENT_PATTERN.finditer(script)}
+
+    passed = set()
+    for match in BUILD_ARG.finditer(script):
+        name, has_value = match.group(2), match.group(3)
+        # `--build-arg NAME` takes the value from the environment
+        if has_value or name in assigned or name in os.environ:
+            passed.add(name)
+
+    return sorted(unset_build_args(instructions) - passed)
+
+
+def check_dockerfile(docker_script: Path, script: str) -> list[str]:
+    reference = dockerfile_reference(script)
+    if reference is None or '$' in reference:
+        # No `docker build` in the script, or a Dockerfile chosen at run time
+        return []
+
+    if reference == '-':
+        heredoc = HEREDOC.search(script)
+        if heredoc is None:
+            return ["Dockerfile is read from stdin but no heredoc was found"]
+        dockerfile = heredoc.group(3)
+    else:
+        path = docker_script.parent / reference
+        if not path.is_file():
+            return [f"Dockerfile not found: {reference}"]
+        dockerfile = path.read_text()
+
+    instructions = dockerfile_instructions(dockerfile)
+    for name in missing_build_args(script, instructions):
+        print(f"⚠️  {docker_script.name}: build arg {name} is not set and will be empty")
+
+    errors = check_instructions(instructions)
+    context = context_reference(script)
+    if context and context != '-' and '$' not in context and not re.match(r'^(https?|git)[:@]', context):
+        errors += check_sources(docker_script.parent / context, dockerfile)
+    return errors
+
+
+def check_build(docker_script: Path) -> list[str]:
+    """
+    Runs every preflight check on one build script.
+
+    :return: The problems found (empty if the build can start)
+    """
+    try:
+        script = docker_script.read_text()
+    except OSError as e:
+        return [f"script cannot be read: {e}"]
+
+    return [*check_script(docker_script), *check_dockerfile(docker_script, script)]
+
+
+def preflight(docker_scripts: set[Path], max_workers: int = 8) -> dict[Path, list[str]]:
+    """
+    Checks all planned builds concurrently.
+
+    :return: Mapping of each script that must not be built to its problems,
+        including the images built FROM a failing image
+    """
+    scripts = sorted(docker_scripts)
+    if not scripts:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(scripts))) as executor:
+        problems = dict(zip(scripts, executor.map(check_build, scripts)))
+
+    failures = {script: errors for script, errors in problems.items() if errors}
+
+    tags = {script: find_image_tag(script) for script in scripts if script.is_file()}
+    bases = {script: base_images(script) for script in scripts if script not in failures}
+
+    # Drop the images depending on a failed image, transitively
+    while True:
+        failed_tags = {
+            normalize_image(tags[script]): script.name
+            for script in failures
+            if tags.get(script)
+        }
+        dependents = {
+            script: [f"depends on {failed_tags[image]}, which failed preflight"]
+            for script in scripts
+            if script not in failures
+            for image in bases[script] & failed_tags.keys()
+        }
+        if not dependents:
+            return failures
+        failures.update(dependents)
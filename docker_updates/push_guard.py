@@ -0,0 +1,350 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+from docker_updates.image_inspect import docker_executable, run_docker
+
+'''
+Skips `docker push` when the registry already has the image being pushed.
+
+Build scripts push their own images, so while a script runs, a `docker` shim
+is placed first on its PATH. The shim hands `docker push` and the build
+commands to this module and every other command to the real CLI. The push
+is skipped when the local image matches the remote tag's manifest or config
+digest, and every decision is appended to a log file read back by
+build_dockers.
+
+`docker buildx build --push` (usually multi-platform) is first built
+without pushing, and its index digest from `--metadata-file` is compared
+with the tags in the registry (`docker buildx imagetools inspect`). Only on
+a mismatch is the build run again with `--push`, from the build cache. Both
+builds run without the provenance attestation, whose timestamps would
+change the digest every time. When the digest cannot be compared (e.g. the
+builder cannot export the image without pushing, or the script sets its
+own attestations), the build is pushed and logged as "not checked".
+
+With pushes disabled (watch mode), `docker push` does nothing and
+`docker buildx build --push` builds without pushing, loading the image
+locally when it is built for a single platform.
+'''
+
+REAL_DOCKER_ENV = 'COURSE_OPS_REAL_DOCKER'
+PUSH_LOG_ENV = 'COURSE_OPS_PUSH_LOG'
+PUSH_MODE_ENV = 'COURSE_OPS_PUSH_MODE'
+
+# Push modes of the shim
+CHECK = 'check'
+DISABLED = 'disabled'
+
+PUSHED = 'pushed'
+UNCHANGED = 'unchanged'
+NOT_PUSHED = 'not pushed'
+NOT_CHECKED = 'not checked'
+
+SHIM = """#!/usr/bin/env bash
+case "$1" in
+    push|build|buildx)
+        exec "{python}" -m docker_updates.push_guard "$@" ;;
+esac
+exec "${REAL_DOCKER_ENV}" "$@"
+"""
+
+LOCAL_REGISTRIES = ('localhost', '127.0.0.1', '[::1]')
+
+
+def repository(image: str) -> str:
+    """
+    Strips the tag or digest from an image reference.
+    """
+    name = image.split('@', 1)[0]
+    if ':' in name.rsplit('/', 1)[-1]:
+        name = name.rsplit(':', 1)[0]
+    return name
+
+
+def local_digests(image: str) -> set[str]:
+    """
+    Gets the digests identifying a local image: its ID (the config digest,
+    or the manifest digest with the containerd image store) and any digests
+    it is already known by in a registry.
+    """
+    process = run_docker('image', 'inspect', '--format', '{{json .}}', image)
+    if process.returncode != 0:
+        return set()
+
+    try:
+        data = json.loads(process.stdout)
+    except json.JSONDecodeError:
+        return set()
+
+    digests = {data.get('Id')}
+    digests.update(
+        repo_digest.partition('@')[2]
+        for repo_digest in data.get('RepoDigests') or []
+        if repo_digest.partition('@')[0] == repository(image)
+    )
+    return {digest for digest in digests if digest}
+
+
+def remote_digests(image: str) -> set[str]:
+    """
+    Gets the manifest and config digests of a tag in its registry.
+    Multi-platform indexes cannot be compared with a single local image,
+    so they yield no digests.
+    """
+    args = ['manifest', 'inspect', '--verbose']
+    if image.split('/', 1)[0].split(':', 1)[0] in LOCAL_REGISTRIES:
+        args.append('--insecure')
+
+    process = run_docker(*args, image)
+    if process.returncode != 0:
+        return set()
+
+    try:
+        data = json.loads(process.stdout)
+    except json.JSONDecodeError:
+        return set()
+
+    if isinstance(data, list):
+        return set()
+
+    digests = {data.get('Descriptor', {}).get('digest')}
+    digests.add(data.get('SchemaV2Manifest', {}).get('config', {}).get('digest'))
+    return {digest for digest in digests if digest}
+
+
+def remote_index_digest(image: str) -> str | None:
+    """
+    Gets the digest of a tag's manifest or multi-platform index in its registry.
+    """
+    process = run_docker('buildx', 'imagetools', 'inspect', '--format', '{{json .Manifest}}', image)
+    if process.returncode != 0:
+        return None
+
+    try:
+        return json.loads(process.stdout).get('digest')
+    except (json.JSONDecodeError, AttributeError):
+        return None
+
+
+def option_values(args: list[str], *names: str) -> list[str]:
+    """
+    Collects the values of a command line option (`-t X`, `--tag X`, `--tag=X`).
+    """
+    values = []
+    for i, arg in enumerate(args):
+        if arg in names and i + 1 < len(args):
+            values.append(args[i + 1])
+        for name in names:
+            if name.startswith('--') and arg.startswith(name + '='):
+                values.append(arg[len(name) + 1:])
+    return values
+
+
+def is_build(args: list[str]) -> bool:
+    return args[:1] == ['build'] or args[:2] == ['buildx', 'build']
+
+
+def is_unchanged(image: str) -> bool:
+    local = local_digests(image)
+    return bool(local) and bool(local & remote_digests(image))
+
+
+def log_push(image: str, outcome: str):
+    log_path = os.environ.get(PUSH_LOG_ENV)
+    if log_path:
+        with open(log_path, 'a') as f:
+            f.write(f'{outcome}\t{image}\n')
+
+
+def read_push_log(log_path: Path) -> dict[str, str]:
+    """
+    Reads the push decisions made during a build.
+
+    :return: Mapping of image reference to "pushed", "unchanged", "not pushed"
+        or "not checked"
+    """
+    if not log_path.exists():
+        return {}
+
+    outcomes = {}
+    for line in log_path.read_text().splitlines():
+        outcome, _, image = line.partition('\t')
+        outcomes[image] = outcome
+    return outcomes
+
+
+@contextmanager
+def push_guard_env(env: dict[str, str] | None = None, push: bool = True):
+    """
+    Creates a docker shim and yields (environment for the build script,
+    path of the push log).
+
+    :param env: Environment of the build script (defaults to os.environ)
+    :param push: Let the script push, skipping unchanged images; when False
+        nothing is pushed at all
+    """
+    env = dict(os.environ if env is None else env)
+    real_docker = shutil.which(docker_executable(), path=env.get('PATH')) or docker_executable()
+    package_root = str(Path(__file__).resolve().parent.parent)
+
+    with tempfile.TemporaryDirectory(prefix='course-ops-push-') as shim_dir:
+        shim = Path(shim_dir) / 'docker'
+        shim.write_text(SHIM.format(python=sys.executable, REAL_DOCKER_ENV=REAL_DOCKER_ENV))
+        shim.chmod(0o755)
+
+        env[REAL_DOCKER_ENV] = real_docker
+        env[PUSH_LOG_ENV] = str(Path(shim_dir) / 'pushes.log')
+        env[PUSH_MODE_ENV] = CHECK if push else DISABLED
+        env['PATH'] = os.pathsep.join([shim_dir, env.get('PATH', '')])
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [package_root, env.get('PYTHONPATH')]))
+
+        yield env, Path(env[PUSH_LOG_ENV])
+
+
+def build_without_push(real_docker: str, args: list[str]) -> int:
+    """
+    Runs a `--push` build without pushing. Single-platform images are
+    loaded into the local store instead.
+    """
+    build_args = [arg for arg in args if arg != '--push']
+    platforms = ','.join(option_values(args, '--platform'))
+    if ',' not in platforms and '--load' not in build_args:
+        build_args.insert(build_args.index('build') + 1, '--load')
+
+    returncode = subprocess.call([real_docker, *build_args])
+    if returncode == 0:
+        for image in option_values(args, '-t', '--tag'):
+            print(f'Not pushing {image}: pushes are disabled')
+            log_push(image, NOT_PUSHED)
+    return returncode
+
+
+def read_stdin(args: list[str]) -> bytes | None:
+    """
+    Reads the Dockerfile or context a build takes from stdin, so the build
+    can be run twice.
+    """
+    if '-' in option_values(args, '-f', '--file') or args[-1] == '-':
+        return sys.stdin.buffer.read()
+    return None
+
+
+def sets_attestations(args: list[str]) -> bool:
+    """
+    Checks if a build configures its own attestations, which are part of
+    the pushed index.
+    """
+    return any(
+        arg.split('=', 1)[0] in ('--provenance', '--sbom', '--attest')
+        for arg in args
+    )
+
+
+def build_unless_unchanged(real_docker: str, args: list[str]) -> int:
+    """
+    Runs a `--push` build without pushing and only pushes (by running the
+    build again, from the cache) when the index digest differs from the
+    registry's.
+
+    The default provenance attestation records build times, which would
+    change the index digest on every build, so both builds run with
+    `--provenance=false`. Builds that configure attestations themselves
+    are pushed without checking.
+    """
+    images = option_values(args, '-t', '--tag')
+    stdin = read_stdin(args)
+
+    def run(build_args: list[str]) -> int:
+        return subprocess.run([real_docker, *build_args], input=stdin).returncode
+
+    def with_options(build_args: list[str], *options: str) -> list[str]:
+        position = build_args.index('build') + 1
+        return [*build_args[:position], *options, *build_args[position:]]
+
+    if sets_attestations(args):
+        print('The build sets its own attestations, pushing without checking the registry')
+        returncode = run(args)
+        if returncode == 0:
+            for image in images:
+                log_push(image, NOT_CHECKED)
+        return returncode
+
+    push_args = with_options(args, '--provenance=false')
+    with tempfile.TemporaryDirectory(prefix='course-ops-build-') as work_dir:
+        metadata_file = Path(work_dir) / 'metadata.json'
+        check_args = with_options(
+            [arg for arg in args if arg != '--push'],
+            '--provenance=false', '--output', 'type=image,push=false', '--metadata-file', str(metadata_file)
+        )
+
+        returncode = run(check_args)
+        if returncode != 0:
+            # A broken build fails once, not again with --push
+            return returncode
+
+        digest = None
+        if metadata_file.exists():
+            digest = json.loads(metadata_file.read_text()).get('containerimage.digest')
+
+    if digest is None:
+        print('Could not get the digest of the build, pushing without checking the registry')
+        returncode = run(push_args)
+        if returncode == 0:
+            for image in images:
+                log_push(image, NOT_CHECKED)
+        return returncode
+
+    if images and all(remote_index_digest(image) == digest for image in images):
+        for image in images:
+            print(f'Skipping push of {image}: registry already has this image')
+            log_push(image, UNCHANGED)
+        return 0
+
+    returncode = run(push_args)
+    if returncode == 0:
+        for image in images:
+            log_push(image, PUSHED)
+    return returncode
+
+
+def main(args: list[str]) -> int:
+    real_docker = os.environ[REAL_DOCKER_ENV]
+    # Inspection inside the shim must reach the real CLI, not the shim
+    os.environ['DOCKER'] = real_docker
+    mode = os.environ.get(PUSH_MODE_ENV, CHECK)
+
+    if is_build(args) and '--push' in args:
+        if mode == DISABLED:
+            return build_without_push(real_docker, args)
+        return build_unless_unchanged(real_docker, args)
+    if args[:1] != ['push']:
+        return subprocess.call([real_docker, *args])
+
+    options = args[1:-1]
+    image = args[-1] if len(args) > 1 else None
+
+    if image and mode == DISABLED:
+        print(f'Not pushing {image}: pushes are disabled')
+        log_push(image, NOT_PUSHED)
+        return 0
+
+    if image and not image.startswith('-') and all(option in ('-q', '--quiet') for option in options):
+        if is_unchanged(image):
+            print(f'Skipping push of {image}: registry already has this image')
+            log_push(image, UNCHANGED)
+            return 0
+
+    returncode = subprocess.call([real_docker, *args])
+    if returncode == 0 and image:
+        log_push(image, PUSHED)
+    return returncode
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,251 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import signal
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from docker_updates.build_dockers import (
+    BuildOptions, DockerBuildResult, build_docker_image, collect_docker_files,
+    separate_base_and_assignment_images
+)
+
+'''
+Watch mode for local image iteration (`build-dockers --watch`).
+
+File events come from inotify (bound through ctypes, Linux only). Bursts of
+edits are debounced, then mapped to build scripts with the same logic as a
+CI run (`collect_docker_files`), and only those images are rebuilt. A newer
+change to an image cancels its in-flight build.
+
+The build scripts push to the tags used for grading, so pushes are disabled
+while watching (see push_guard) unless `--watch-push` is given.
+'''
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')
+
+IGNORED_DIRECTORIES = {'.git', '.idea', '.venv', '__pycache__', 'node_modules'}
+
+
+class Inotify:
+    """
+    Recursive inotify watch on a directory tree.
+    """
+
+    def __init__(self, root: Path):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+        self.directories: dict[int, Path] = {}
+        self.add_tree(root)
+
+    def add_watch(self, directory: Path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd >= 0:
+            self.directories[wd] = directory
+
+    def add_tree(self, root: Path):
+        for directory, subdirectories, _ in os.walk(root):
+            subdirectories[:] = [d for d in subdirectories if d not in IGNORED_DIRECTORIES]
+            self.add_watch(Path(directory))
+
+    def read_events(self, timeout: float | None) -> list[Path] | None:
+        """
+        Waits for file events.
+
+        :param timeout: Seconds to wait, or None to wait indefinitely
+        :return: The changed paths, or None if the kernel queue overflowed
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        buffer = os.read(self.fd, 64 * 1024)
+        paths = []
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = buffer[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if mask & IN_IGNORED:
+                self.directories.pop(wd, None)
+                continue
+
+            directory = self.directories.get(wd)
+            if directory is None or not name:
+                continue
+
+            path = directory / os.fsdecode(name)
+            if mask & IN_ISDIR:
+                if path.name in IGNORED_DIRECTORIES:
+                    continue
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # Files may be written before the new watch exists, so
+                    # report everything already inside the new directory
+                    self.add_tree(path)
+                    paths.extend(p for p in path.rglob('*') if p.is_file())
+            else:
+                paths.append(path)
+
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+@dataclass
+class ImageBuild:
+    generation: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class ImageRebuilder:
+    """
+    Rebuilds images in the background. Each image builds at most once at a
+    time; scheduling an image again cancels its running build, and builds
+    superseded before they start are skipped.
+    """
+
+    def __init__(self, options: BuildOptions):
+        self.options = options
+        self.images: dict[Path, ImageBuild] = {}
+        self.lock = threading.Lock()
+
+    def cancel(self, docker_script: Path):
+        process = self.options.running.get(docker_script)
+        if process and process.poll() is None:
+            print(f"Cancelling in-flight build: {docker_script.name}")
+            try:
+                os.killpg(process.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def schedule(self, docker_scripts: set[Path]):
+        base_images, assignment_images = separate_base_and_assignment_images(docker_scripts)
+
+        with self.lock:
+            generations = {}
+            for script in docker_scripts:
+                image = self.images.setdefault(script, ImageBuild())
+                image.generation += 1
+                generations[script] = image.generation
+                self.cancel(script)
+
+        # Base images still go first, assignment images wait for them
+        base_threads = [
+            self.start(script, generations[script], [])
+            for script in base_images
+        ]
+        for script in assignment_images:
+            self.start(script, generations[script], base_threads)
+
+    def start(self, docker_script: Path, generation: int, wait_for: list[threading.Thread]) -> threading.Thread:
+        thread = threading.Thread(
+            target=self.build,
+            args=(docker_script, generation, wait_for),
+            daemon=True
+        )
+        thread.start()
+        return thread
+
+    def build(self, docker_script: Path, generation: int, wait_for: list[threading.Thread]):
+        for thread in wait_for:
+            thread.join()
+
+        image = self.images[docker_script]
+        with image.lock:
+            if image.generation != generation:
+                return
+
+            result = DockerBuildResult()
+            build_docker_image(docker_script, result, self.options)
+
+            if image.generation != generation:
+                print(f"Superseded by newer changes: {docker_script.name}")
+
+    def stop(self):
+        for docker_script in list(self.options.running):
+            self.cancel(docker_script)
+
+
+def changed_scripts(paths: set[Path], root: Path, options: BuildOptions) -> set[Path]:
+    """
+    Maps changed paths to the build scripts they affect, exactly as a CI run
+    would for the same diff.
+    """
+    relative = [
+        str(path.relative_to(root))
+        for path in paths
+        if path.is_relative_to(root)
+    ]
+    return collect_docker_files(' '.join(relative), root, options.path_rules)
+
+
+def watch(root_dir: str, options: BuildOptions | None = None, debounce: float = 0.5):
+    """
+    Watches a course repository and rebuilds the images affected by each
+    burst of edits, until interrupted.
+
+    :param root_dir: Root directory of the repository
+    :param options: Build options (size budgets, ...)
+    :param debounce: Seconds without events before a burst is processed
+    """
+    root = Path(root_dir).resolve()
+    rebuilder = ImageRebuilder(options or BuildOptions(push=False))
+    inotify = Inotify(root)
+
+    print(f"Watching {root} for changes (Ctrl+C to stop)...")
+
+    pending: set[Path] = set()
+    deadline = None
+    try:
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            events = inotify.read_events(timeout)
+
+            if events is None:
+                print("Too many file events, rescanning the repository")
+                inotify.close()
+                inotify = Inotify(root)
+                continue
+
+            if events:
+                pending.update(events)
+                deadline = time.monotonic() + debounce
+                continue
+
+            if pending and time.monotonic() >= deadline:
+                docker_scripts = changed_scripts(pending, root, rebuilder.options)
+                pending.clear()
+                deadline = None
+
+                if docker_scripts:
+                    names = ', '.join(sorted(script.name for script in docker_scripts))
+                    print(f"\n=== Changes affect: {names} ===")
+                    rebuilder.schedule(docker_scripts)
+    except KeyboardInterrupt:
+        print("\nStopping watch mode")
+    finally:
+        rebuilder.stop()
+        inotify.close()
@@ -0,0 +1,55 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from docker_updates.build_context import minimize_context
+
+
+class MinimizeContextTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def build(self, name: str, dockerfile: str, script: str) -> Path:
+        folder = self.root / name
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / 'Dockerfile').write_text(dockerfile)
+        docker_script = folder / f'build-{name}-docker.sh'
+        docker_script.write_text(script)
+        return docker_script
+
+    def test_writes_dockerignore_for_script_folder(self):
+        docker_script = self.build(
+            'hw1',
+            'FROM python:3.12\nRUN python -c "print(1<<20)"\nCOPY main.py /app/\n',
+            'docker build -t hw1 .\n'
+        )
+        (docker_script.parent / 'main.py').write_text('print(1)\n')
+        (docker_script.parent / 'solution.bin').write_bytes(b'0' * 10000)
+
+        report = minimize_context(docker_script, write=True)
+
+        self.assertTrue(report.written)
+        self.assertLess(report.size_after, report.size_before)
+        ignore = (docker_script.parent / '.dockerignore').read_text().splitlines()
+        self.assertIn('!main.py', ignore)
+        self.assertNotIn('!solution.bin', ignore)
+
+    def test_skips_other_build_contexts(self):
+        (self.root / 'shared').mkdir()
+        docker_script = self.build('hw1', 'FROM python:3.12\nCOPY shared/ /app/\n', 'docker build -f Dockerfile -t hw1 ..\n')
+
+        report = minimize_context(docker_script, write=True)
+
+        self.assertIsNotNone(report.skipped)
+        self.assertFalse(report.written)
+        self.assertEqual(report.output(), {})
+        self.assertFalse((docker_script.parent / '.dockerignore').exists())
+        self.assertFalse((self.root / '.dockerignore').exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from course_updates.docker_notification import check_docker_payload
+from docker_updates.build_history import BuildRecord, find_regressions, open_history, record_builds
+
+
+class RegressionsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.connection = open_history(Path(self.directory.name) / 'history.sqlite')
+
+    def tearDown(self):
+        self.connection.close()
+        self.directory.cleanup()
+
+    def record(self, duration: float, success: bool = True):
+        record_builds(self.connection, [
+            BuildRecord('build-hw1-docker.sh', 'hash', duration, None, None, success, '2026-01-01T00:00:00')
+        ])
+
+    def test_slower_build_is_a_regression(self):
+        for duration in (100, 100, 100, 200):
+            self.record(duration)
+        regressions = find_regressions(self.connection)
+        self.assertEqual([(r.image, r.metric) for r in regressions], [('build-hw1-docker.sh', 'duration')])
+
+    def test_failed_latest_build_is_not_evaluated(self):
+        for duration in (100, 100, 100, 200):
+            self.record(duration)
+        self.record(5, success=False)
+        self.assertEqual(find_regressions(self.connection), [])
+
+
+class DockerPayloadTest(unittest.TestCase):
+    def payload(self, **values) -> dict:
+        data = {"updated_images": [], "unchanged_images": [], "failed_images": [], "error": ""}
+        data.update(values)
+        return data
+
+    def test_nothing_to_report(self):
+        self.assertFalse(check_docker_payload(self.payload()))
+
+    def test_unchanged_images_and_warnings_are_reported(self):
+        self.assertTrue(check_docker_payload(self.payload(unchanged_images=["build-hw1-docker.sh"])))
+        self.assertTrue(check_docker_payload(self.payload(regressions=["build-hw1-docker.sh: duration"])))
+        self.assertTrue(check_docker_payload(self.payload(flaky_images=["build-hw1-docker.sh"])))
+        self.assertTrue(check_docker_payload(self.payload(over_budget_images=["build-hw1-docker.sh"])))
+
+
+if __name__ == '__main__':
+    unittest.main()
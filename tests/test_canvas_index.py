@@ -0,0 +1,52 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from course_updates.canvas_index import diff_deployment, load_index, save_index
+from course_updates.canvas_notification import check_canvas_payload
+
+
+class CanvasIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.index = str(Path(self.directory.name) / 'canvas_index.jsonl.gz')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_delta(self):
+        save_index(self.index, [
+            ['page', 'Syllabus', 'https://canvas/pages/syllabus'],
+            ['page', 'Old Page', 'https://canvas/pages/old'],
+            ['assignment', 'HW 1', 'https://canvas/assignments/1', 'hash1'],
+            ['assignment', 'HW 2', 'https://canvas/assignments/2', 'hash2'],
+        ])
+        delta = diff_deployment(load_index(self.index), [
+            ['page', 'Syllabus', 'https://canvas/pages/syllabus'],
+            ['assignment', 'HW 1', 'https://canvas/assignments/1', 'hash1'],
+            ['assignment', 'HW 2', 'https://canvas/assignments/2', 'hash3'],
+            ['page', 'New Page', 'https://canvas/pages/new'],
+        ])
+        self.assertEqual(delta.output(), {
+            "added": [['page', 'New Page', 'https://canvas/pages/new']],
+            "changed": [['assignment', 'HW 2', 'https://canvas/assignments/2', 'hash3']],
+            "removed": [['page', 'Old Page', None]],
+            "redeployed": 1,
+            "unchanged": 1,
+        })
+
+    def test_index_is_replaced(self):
+        save_index(self.index, [['page', 'Old Page', 'https://canvas/pages/old']])
+        save_index(self.index, [['page', 'New Page', 'https://canvas/pages/new']])
+        self.assertEqual(list(load_index(self.index)), [('page', 'New Page')])
+
+    def test_redeployed_items_are_reported(self):
+        payload = {"deployed_content": [], "content_to_review": [], "error": ""}
+        delta = {"added": [], "changed": [], "removed": [], "redeployed": 0, "unchanged": 3}
+        self.assertFalse(check_canvas_payload(dict(payload, deployed_delta=delta)))
+        self.assertTrue(check_canvas_payload(dict(payload, deployed_delta=dict(delta, redeployed=2))))
+        self.assertTrue(check_canvas_payload(dict(payload, deployed_delta=dict(delta, removed=[['page', 'Old Page', None]]))))
+
+
+if __name__ == '__main__':
+    unittest.main()
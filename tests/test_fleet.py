@@ -0,0 +1,51 @@
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from docker_updates.build_dockers import BuildOptions
+from docker_updates.fleet import main
+
+
+class FleetTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_course_that_cannot_be_planned_still_gets_output(self):
+        for course_id in ('235', '236'):
+            (self.root / course_id).mkdir()
+        fleet_file = self.root / 'fleet.json'
+        fleet_file.write_text(json.dumps({"courses": [
+            {
+                "course_id": "235",
+                "root_dir": str(self.root / '235'),
+                "files": "hw1/solution/main.py",
+                "output_file": str(self.root / 'logs' / '235.json'),
+                "path_rules": str(self.root / 'missing_rules.json'),
+            },
+            {
+                "course_id": "236",
+                "root_dir": str(self.root / '236'),
+                "files": "README.md",
+                "output_file": str(self.root / 'logs' / '236.json'),
+            },
+        ]}))
+
+        with redirect_stdout(StringIO()):
+            main(str(fleet_file), BuildOptions())
+
+        broken = json.loads((self.root / 'logs' / '235.json').read_text())
+        self.assertIn('Planning failed', broken['error'])
+        working = json.loads((self.root / 'logs' / '236.json').read_text())
+        self.assertEqual(working['error'], '')
+        self.assertEqual(working['failed_images'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import json
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from pathlib import Path
+
+from docker_updates.live_progress import BUILDING, UPDATED, LiveProgress, NotificationInfo
+
+
+class StubDiscord(BaseHTTPRequestHandler):
+    """
+    Records every request and answers with the queued responses, then with
+    a message id.
+    """
+    def respond(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.requests.append((time.monotonic(), self.command, self.path, json.loads(body)))
+        status, response = self.server.responses.pop(0) if self.server.responses else (200, {"id": "1"})
+        data = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_POST = respond
+    do_PATCH = respond
+
+    def log_message(self, *args):
+        pass
+
+
+def build_output(**values) -> dict:
+    data = {
+        "updated_images": [], "unchanged_images": [], "failed_images": [], "error": "", "image_details": {},
+        "regressions": [], "flaky_images": [], "over_budget_images": [],
+    }
+    data.update(values)
+    return data
+
+
+class LiveProgressTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubDiscord)
+        self.server.requests = []
+        self.server.responses = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_port}/api/webhooks/1/token'
+        self.info = NotificationInfo('235', 'author', 'https://example.com/icon.png', 'main', 'https://example.com/run')
+        self.scripts = [Path('build-hw1-docker.sh'), Path('build-hw2-docker.sh')]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def progress(self, min_interval: float) -> LiveProgress:
+        progress = LiveProgress(self.url, self.info, min_interval=min_interval)
+        with redirect_stdout(StringIO()):
+            progress.queued(self.scripts)
+        return progress
+
+    def edits(self) -> list[tuple[float, dict]]:
+        return [(sent, body) for sent, method, _, body in self.server.requests if method == 'PATCH']
+
+    def test_edits_are_throttled_and_coalesced(self):
+        progress = self.progress(min_interval=0.3)
+        progress.update(self.scripts[0], BUILDING)
+        progress.update(self.scripts[0], UPDATED)
+        progress.update(self.scripts[1], BUILDING)
+        time.sleep(0.5)
+        progress.finish(build_output(updated_images=['build-hw1-docker.sh']))
+
+        posted = self.server.requests[0]
+        self.assertEqual((posted[1], posted[2]), ('POST', '/api/webhooks/1/token?wait=true'))
+
+        # The three updates are coalesced into one edit, followed by the summary
+        edits = self.edits()
+        self.assertEqual(len(edits), 2)
+        progress_fields = json.dumps(edits[0][1])
+        self.assertIn('build-hw1-docker.sh', progress_fields)
+        self.assertIn('**Building:**', progress_fields)
+        self.assertIn('**Updated:**', progress_fields)
+
+        sent = [posted[0], *(sent for sent, _ in edits)]
+        for earlier, later in zip(sent, sent[1:]):
+            self.assertGreaterEqual(later - earlier, 0.3 * 0.9)
+
+    def test_rate_limited_edit_is_retried(self):
+        self.server.responses = [(200, {"id": "1"}), (429, {"retry_after": 0.05})]
+        progress = self.progress(min_interval=0.01)
+        progress.update(self.scripts[0], BUILDING)
+        time.sleep(0.3)
+        progress.finish(build_output(updated_images=['build-hw1-docker.sh']))
+
+        edits = self.edits()
+        self.assertEqual(len(edits), 3)
+        self.assertEqual(edits[0][1], edits[1][1])
+        self.assertGreaterEqual(edits[1][0] - edits[0][0], 0.05)
+        self.assertTrue(progress.summary_sent)
+
+    def test_summary_replaces_progress(self):
+        progress = self.progress(min_interval=0.01)
+        progress.finish(build_output(updated_images=['build-hw1-docker.sh'], unchanged_images=['build-hw2-docker.sh']))
+
+        _, method, path, body = self.server.requests[-1]
+        self.assertEqual((method, path), ('PATCH', '/api/webhooks/1/token/messages/1'))
+        embed = body['embeds'][0]
+        self.assertEqual(embed['title'], 'CS 235 - Docker Updates')
+        fields = {field['name']: field['value'] for field in embed['fields']}
+        self.assertEqual(fields['**Updated Image(s):**'], '- build-hw1-docker.sh')
+        self.assertEqual(fields['**Unchanged Image(s):**'], '- build-hw2-docker.sh')
+        self.assertTrue(progress.summary_sent)
+
+    def test_rejected_summary_is_not_sent(self):
+        progress = self.progress(min_interval=0.01)
+        self.server.responses = [(400, {"message": "Invalid Form Body"})]
+        with redirect_stdout(StringIO()):
+            progress.finish(build_output())
+        self.assertFalse(progress.summary_sent)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import itertools
+import re
+import unittest
+from pathlib import Path
+
+from docker_updates.path_rules import PathRule, PathRules, default_path_rules, segment_regex
+
+
+def heuristic_assignments(files: list[Path]) -> set[Path]:
+    """
+    The hard-coded heuristics find_assignments used before path rules.
+    """
+    assignments = set()
+    for file in files:
+        file = Path(file)
+        if 'solution' in file.parent.name:
+            assignments.add(file.parent.parent)
+        elif 'worlds' in file.parent.name or 'test_files' in file.parent.name:
+            assignments.add(file.parent.parent.parent)
+        elif 'activities' in file.name:
+            assignments.add(file.parent)
+    return assignments
+
+
+NAMES = [
+    'hw1', 'labs', 'solution', 'my_solution_v2', 'worlds', 'x_worlds',
+    'test_files', 'activities.json', 'lab_activities', 'main.py', 'README.md',
+]
+
+
+def sample_paths(max_depth: int = 4) -> list[str]:
+    return [
+        '/'.join(components)
+        for depth in range(1, max_depth + 1)
+        for components in itertools.product(NAMES, repeat=depth)
+    ]
+
+
+class DefaultRulesTest(unittest.TestCase):
+    def test_matches_heuristics(self):
+        root = Path('/repo')
+        rules = default_path_rules()
+        for path in sample_paths():
+            expected = heuristic_assignments([root / path])
+            if any(not assignment.is_relative_to(root) for assignment in expected):
+                # The heuristics could climb above the repository root
+                continue
+            with self.subTest(path=path):
+                self.assertEqual(rules.assignment_roots([root / path], root), expected)
+
+    def test_matches_heuristics_for_relative_paths(self):
+        rules = default_path_rules()
+        files = [
+            Path('hw1/solution/main.py'),
+            Path('labs/lab2/worlds/world1.txt'),
+            Path('hw3/tests/test_files/input.txt'),
+            Path('labs/lab4/lab4_activities.json'),
+            Path('README.md'),
+        ]
+        self.assertEqual(rules.assignment_roots(files), heuristic_assignments(files))
+        self.assertEqual(rules.assignment_roots(files), {Path('hw1'), Path('labs'), Path('hw3'), Path('labs/lab4')})
+
+    def test_many_files(self):
+        root = Path('/repo')
+        files = [root / f'hw{i % 20}' / 'solution' / f'file_{i}.py' for i in range(5000)]
+        self.assertEqual(default_path_rules().assignment_roots(files, root), heuristic_assignments(files))
+
+
+class PathRulesTest(unittest.TestCase):
+    def assignment(self, rules: list[dict], path: str) -> set[Path]:
+        path_rules = PathRules([PathRule.from_dict(rule) for rule in rules])
+        return path_rules.assignment_roots([Path('/repo') / path], Path('/repo'))
+
+    def test_first_matching_rule_wins(self):
+        rules = [
+            {"pattern": "labs/*/tests/**", "depth": 2},
+            {"pattern": "**/tests/*", "up": 3},
+        ]
+        self.assertEqual(self.assignment(rules, 'labs/lab1/tests/a.txt'), {Path('/repo/labs/lab1')})
+        self.assertEqual(self.assignment(rules, 'hw/hw1/tests/a.txt'), {Path('/repo/hw')})
+
+    def test_anchor(self):
+        rules = [{"pattern": "projects/**/data/**", "anchor": "project*"}]
+        self.assertEqual(
+            self.assignment(rules, 'projects/project2/part1/data/big/file.csv'),
+            {Path('/repo/projects/project2')}
+        )
+
+    def test_double_star_matches_no_components(self):
+        rules = [{"pattern": "**/solution/**", "up": 2}]
+        self.assertEqual(self.assignment(rules, 'solution/main.py'), {Path('/repo')})
+
+    def test_unmatched_files_are_ignored(self):
+        self.assertEqual(self.assignment([{"pattern": "*/solution/*", "up": 2}], 'hw1/notes/a.md'), set())
+
+    def test_many_rules(self):
+        rules = [{"pattern": f"**/*sol{i}*/*", "up": 2} for i in range(300)]
+        path_rules = PathRules([PathRule.from_dict(rule) for rule in rules])
+        root = Path('/repo')
+        files = [root / f'hw{i % 50}' / f'x_sol{i % 300}_y' / f'file_{i}.py' for i in range(3000)]
+
+        self.assertEqual(path_rules.assignment_roots(files, root), {root / f'hw{i}' for i in range(50)})
+        # Neither file names nor rule count grow the transition cache
+        self.assertLessEqual(len(path_rules.transitions), 50 + 300 * 2)
+
+    def test_first_rule_wins_with_overlapping_globs(self):
+        rules = [
+            {"pattern": "**/*_sol/*.py", "up": 1},
+            {"pattern": "**/a_*/*", "up": 2},
+        ]
+        self.assertEqual(self.assignment(rules, 'hw/a_sol/main.py'), {Path('/repo/hw/a_sol')})
+        self.assertEqual(self.assignment(rules, 'hw/a_sol/main.txt'), {Path('/repo/hw')})
+
+
+class SegmentRegexTest(unittest.TestCase):
+    def test_globs(self):
+        cases = [
+            ('*solution*', 'my_solution_v2', True),
+            ('*solution*', 'solutions', True),
+            ('*solution*', 'sol', False),
+            ('hw?', 'hw1', True),
+            ('hw?', 'hw10', False),
+            ('lab[0-9]', 'lab3', True),
+            ('lab[!0-9]', 'lab3', False),
+            ('file.py', 'file_py', False),
+        ]
+        for glob, name, expected in cases:
+            with self.subTest(glob=glob, name=name):
+                self.assertEqual(bool(re.fullmatch(segment_regex(glob), name, re.DOTALL)), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from docker_updates.build_context import context_reference, context_sources, dockerfile_instructions
+from docker_updates.preflight import check_build
+
+
+class PreflightTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def build(self, name: str, dockerfile: str, script: str) -> Path:
+        folder = self.root / name
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / 'Dockerfile').write_text(dockerfile)
+        docker_script = folder / f'build-{name}-docker.sh'
+        docker_script.write_text(script)
+        return docker_script
+
+    def test_global_arg_default_applies_to_stage(self):
+        docker_script = self.build(
+            'hw1',
+            'ARG PY=3.12\nFROM python:${PY}-slim\nARG PY\nRUN echo $PY\n',
+            'docker build -t hw1 .\n'
+        )
+        output = StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(check_build(docker_script), [])
+        self.assertEqual(output.getvalue(), '')
+
+    def test_unset_build_arg_is_a_warning(self):
+        docker_script = self.build('hw1', 'FROM python:3.12\nARG TOKEN\nRUN echo $TOKEN\n', 'docker build -t hw1 .\n')
+        output = StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(check_build(docker_script), [])
+        self.assertIn('build arg TOKEN is not set', output.getvalue())
+
+    def test_sources_are_checked_in_the_build_context(self):
+        (self.root / 'shared').mkdir()
+        docker_script = self.build(
+            'hw1',
+            'FROM python:3.12\nCOPY shared/ /app/\n',
+            'docker build -f Dockerfile -t hw1 ..\n'
+        )
+        self.assertEqual(check_build(docker_script), [])
+
+        missing = self.build('hw2', 'FROM python:3.12\nCOPY missing.txt /app/\n', 'docker build -t hw2 .\n')
+        self.assertEqual(check_build(missing), ['COPY source does not exist: missing.txt'])
+
+    def test_heredoc_copy(self):
+        docker_script = self.build(
+            'hw1',
+            'FROM python:3.12\nCOPY <<EOF /app/config.ini\n[x]\na=1\nEOF\n',
+            'docker build -t hw1 .\n'
+        )
+        self.assertEqual(check_build(docker_script), [])
+
+    def test_comments_inside_continuation(self):
+        docker_script = self.build(
+            'hw1',
+            'FROM python:3.12\n'
+            'RUN pip install numpy && \\\n'
+            '    # grading deps\n'
+            '    pip install pytest\n'
+            'RUN apt-get update && \\\n'
+            '    # compilers\n'
+            '\n'
+            '    apt-get install -y gcc\n',
+            'docker build -t hw1 .\n'
+        )
+        self.assertEqual(check_build(docker_script), [])
+
+    def test_shift_operator_is_not_a_heredoc(self):
+        docker_script = self.build(
+            'hw1',
+            'FROM python:3.12\nRUN python -c "print(1<<20)"\nCOPY missing.txt /app/\n',
+            'docker build -t hw1 .\n'
+        )
+        self.assertEqual(check_build(docker_script), ['COPY source does not exist: missing.txt'])
+
+
+class BuildContextTest(unittest.TestCase):
+    def test_context_reference(self):
+        self.assertEqual(context_reference('docker build -t x:latest .\n'), '.')
+        self.assertEqual(context_reference('docker build -f Dockerfile ..\n'), '..')
+        self.assertEqual(context_reference('docker buildx build \\\n  --push \\\n  -f - ctx <<EOF\nFROM x\nEOF\n'), 'ctx')
+        self.assertIsNone(context_reference('rm -f build.log\n'))
+
+    def test_dockerfile_instructions(self):
+        dockerfile = (
+            'FROM x\n'
+            'RUN apt-get update && \\\n'
+            '    # comment\n'
+            '    apt-get install -y gcc\n'
+            'RUN cat <<\'EOF\' > /etc/config\n'
+            'a=1\n'
+            'EOF\n'
+            'COPY src/ /app/\n'
+        )
+        self.assertEqual(dockerfile_instructions(dockerfile), [
+            ('FROM', 'x'),
+            ('RUN', 'apt-get update &&  apt-get install -y gcc'),
+            ('RUN', "cat <<'EOF' > /etc/config\na=1\nEOF"),
+            ('COPY', 'src/ /app/'),
+        ])
+
+    def test_heredoc_sources_are_skipped(self):
+        dockerfile = 'FROM x\nCOPY <<EOF /app/config.ini\n[x]\nEOF\nCOPY src/ /app/\n'
+        self.assertEqual(context_sources(dockerfile), ['Dockerfile', '.dockerignore', 'src'])
+
+
+if __name__ == '__main__':
+    unittest.main()
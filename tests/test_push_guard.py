@@ -0,0 +1,175 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from docker_updates.push_guard import (
+    CHECK, DISABLED, NOT_CHECKED, NOT_PUSHED, PUSH_LOG_ENV, PUSH_MODE_ENV, PUSHED, REAL_DOCKER_ENV, UNCHANGED,
+    is_unchanged, main, push_guard_env, read_push_log
+)
+
+# Stands in for the docker CLI and a registry: records its calls and answers
+# inspections with the digests given in STUB_* environment variables.
+STUB_DOCKER = """#!{python}
+import json
+import os
+import sys
+
+args = sys.argv[1:]
+with open(os.environ['STUB_CALLS'], 'a') as f:
+    f.write(json.dumps(args) + '\\n')
+
+local = os.environ.get('STUB_LOCAL_DIGEST')
+remote = os.environ.get('STUB_REMOTE_DIGEST')
+
+if args[:2] == ['image', 'inspect']:
+    if not local:
+        sys.exit(1)
+    print(json.dumps({{'Id': local, 'RepoDigests': []}}))
+elif args[:2] == ['manifest', 'inspect']:
+    if not remote:
+        sys.exit(1)
+    print(json.dumps({{'Descriptor': {{'digest': remote}}, 'SchemaV2Manifest': {{'config': {{'digest': 'sha256:config'}}}}}}))
+elif args[:3] == ['buildx', 'imagetools', 'inspect']:
+    if not remote:
+        sys.exit(1)
+    print(json.dumps({{'digest': remote}}))
+elif 'build' in args[:2]:
+    if os.environ.get('STUB_BUILD_FAIL'):
+        sys.exit(int(os.environ['STUB_BUILD_FAIL']))
+    if '--metadata-file' in args and os.environ.get('STUB_BUILD_DIGEST'):
+        with open(args[args.index('--metadata-file') + 1], 'w') as f:
+            json.dump({{'containerimage.digest': os.environ['STUB_BUILD_DIGEST']}}, f)
+"""
+
+IMAGE = 'localhost:5000/hw1:latest'
+BUILDX_PUSH = ['buildx', 'build', '--platform', 'linux/amd64,linux/arm64', '-t', IMAGE, '--push', '.']
+
+
+class PushGuardTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        root = Path(self.directory.name)
+        self.docker = root / 'bin' / 'docker'
+        self.docker.parent.mkdir()
+        self.docker.write_text(STUB_DOCKER.format(python=sys.executable))
+        self.docker.chmod(0o755)
+        self.calls_file = root / 'calls.jsonl'
+        self.push_log = root / 'pushes.log'
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def environment(self, mode: str = CHECK, **stub) -> dict[str, str]:
+        env = {
+            'DOCKER': str(self.docker),
+            REAL_DOCKER_ENV: str(self.docker),
+            PUSH_LOG_ENV: str(self.push_log),
+            PUSH_MODE_ENV: mode,
+            'STUB_CALLS': str(self.calls_file),
+        }
+        env.update({f'STUB_{name.upper()}': value for name, value in stub.items()})
+        return env
+
+    def run_guard(self, args: list[str], mode: str = CHECK, **stub) -> int:
+        with mock.patch.dict(os.environ, self.environment(mode, **stub)), redirect_stdout(StringIO()):
+            return main(args)
+
+    def calls(self) -> list[list[str]]:
+        if not self.calls_file.exists():
+            return []
+        return [json.loads(line) for line in self.calls_file.read_text().splitlines()]
+
+    def builds(self) -> list[list[str]]:
+        return [call for call in self.calls() if call[:2] == ['buildx', 'build']]
+
+    def test_is_unchanged(self):
+        with mock.patch.dict(os.environ, self.environment(local_digest='sha256:a', remote_digest='sha256:a')):
+            self.assertTrue(is_unchanged(IMAGE))
+        with mock.patch.dict(os.environ, self.environment(local_digest='sha256:a', remote_digest='sha256:b')):
+            self.assertFalse(is_unchanged(IMAGE))
+        with mock.patch.dict(os.environ, self.environment(local_digest='sha256:a')):
+            self.assertFalse(is_unchanged(IMAGE))
+
+    def test_push_of_unchanged_image_is_skipped(self):
+        self.assertEqual(self.run_guard(['push', IMAGE], local_digest='sha256:a', remote_digest='sha256:a'), 0)
+        self.assertNotIn(['push', IMAGE], self.calls())
+        self.assertEqual(read_push_log(self.push_log), {IMAGE: UNCHANGED})
+
+    def test_push_of_changed_image(self):
+        self.assertEqual(self.run_guard(['push', IMAGE], local_digest='sha256:a', remote_digest='sha256:b'), 0)
+        self.assertIn(['push', IMAGE], self.calls())
+        self.assertEqual(read_push_log(self.push_log), {IMAGE: PUSHED})
+
+    def test_push_disabled(self):
+        self.assertEqual(self.run_guard(['push', IMAGE], mode=DISABLED), 0)
+        self.assertEqual(self.calls(), [])
+        self.assertEqual(read_push_log(self.push_log), {IMAGE: NOT_PUSHED})
+
+    def test_unchanged_buildx_build_is_not_pushed(self):
+        self.assertEqual(self.run_guard(BUILDX_PUSH, build_digest='sha256:a', remote_digest='sha256:a'), 0)
+        builds = self.builds()
+        self.assertEqual(len(builds), 1)
+        self.assertNotIn('--push', builds[0])
+        self.assertIn('--provenance=false', builds[0])
+        self.assertEqual(read_push_log(self.push_log), {IMAGE: UNCHANGED})
+
+    def test_changed_buildx_build_is_pushed_without_provenance(self):
+        self.assertEqual(self.run_guard(BUILDX_PUSH, build_digest='sha256:a', remote_digest='sha256:b'), 0)
+        check, push = self.builds()
+        self.assertNotIn('--push', check)
+        self.assertIn('--push', push)
+        self.assertIn('--provenance=false', push)
+        self.assertEqual(read_push_log(self.push_log), {IMAGE: PUSHED})
+
+    def test_failed_buildx_build_runs_once(self):
+        self.assertEqual(self.run_guard(BUILDX_PUSH, build_fail='3'), 3)
+        self.assertEqual(len(self.builds()), 1)
+        self.assertEqual(read_push_log(self.push_log), {})
+
+    def test_buildx_build_without_digest_is_not_checked(self):
+        self.assertEqual(self.run_guard(BUILDX_PUSH, remote_digest='sha256:a'), 0)
+        check, push = self.builds()
+        self.assertIn('--push', push)
+        self.assertEqual(read_push_log(self.push_log), {IMAGE: NOT_CHECKED})
+
+    def test_buildx_build_with_attestations_is_not_checked(self):
+        args = [*BUILDX_PUSH[:-1], '--provenance=mode=max', '.']
+        self.assertEqual(self.run_guard(args, build_digest='sha256:a', remote_digest='sha256:a'), 0)
+        self.assertEqual(self.builds(), [args])
+        self.assertEqual(read_push_log(self.push_log), {IMAGE: NOT_CHECKED})
+
+    def test_buildx_build_disabled(self):
+        self.assertEqual(self.run_guard(BUILDX_PUSH, mode=DISABLED), 0)
+        builds = self.builds()
+        self.assertEqual(len(builds), 1)
+        self.assertNotIn('--push', builds[0])
+        self.assertEqual(read_push_log(self.push_log), {IMAGE: NOT_PUSHED})
+
+    def test_shim(self):
+        script = f'docker push {IMAGE}\ndocker tag hw1 {IMAGE}\n'
+        env = {
+            **os.environ,
+            **self.environment(local_digest='sha256:a', remote_digest='sha256:a'),
+            'PATH': os.pathsep.join([str(self.docker.parent), os.environ.get('PATH', '')]),
+        }
+        with mock.patch.dict(os.environ, {'DOCKER': 'docker'}):
+            with push_guard_env(env) as (script_env, push_log):
+                self.assertEqual(script_env[REAL_DOCKER_ENV], str(self.docker))
+                process = subprocess.run(['bash', '-c', script], env=script_env, stdout=subprocess.PIPE)
+                self.assertEqual(process.returncode, 0)
+                outcomes = read_push_log(push_log)
+
+        self.assertEqual(outcomes, {IMAGE: UNCHANGED})
+        self.assertIn(['tag', 'hw1', IMAGE], self.calls())
+        self.assertNotIn(['push', IMAGE], self.calls())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import json
+import tempfile
+import threading
+import unittest
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from course_updates.webhook import CHUNK_SIZE, execute_webhook_with_files
+
+
+class RecordingHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        # Reads whatever the client sends, not just Content-Length bytes,
+        # until it waits for the response
+        self.connection.settimeout(0.2)
+        body = b''
+        try:
+            while chunk := self.rfile.read1(CHUNK_SIZE):
+                body += chunk
+        except OSError:
+            pass
+        self.server.requests.append((self.path, self.headers, body))
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', '12')
+        self.end_headers()
+        self.wfile.write(b'{"id": "1"} ')
+
+    def log_message(self, *args):
+        pass
+
+
+class MultipartTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), RecordingHandler)
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_port}/api/webhooks/1/token'
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def test_content_length_matches_the_body(self):
+        files = [Path(self.directory.name) / 'build-hw1-docker.log', Path(self.directory.name) / 'empty.log']
+        files[0].write_bytes(bytes(range(256)) * (CHUNK_SIZE // 128 + 3))
+        files[1].write_bytes(b'')
+
+        response = execute_webhook_with_files(self.url, {"content": "logs"}, files, params={"wait": "true"})
+
+        self.assertEqual(response.status_code, 200)
+        path, headers, body = self.server.requests[0]
+        self.assertEqual(path, '/api/webhooks/1/token?wait=true')
+        self.assertEqual(int(headers['Content-Length']), len(body))
+
+        message = BytesParser(policy=HTTP).parsebytes(
+            f'Content-Type: {headers["Content-Type"]}\r\n\r\n'.encode() + body
+        )
+        parts = list(message.iter_parts())
+        self.assertEqual(json.loads(parts[0].get_content()), {
+            "content": "logs",
+            "attachments": [{"id": 0, "filename": 'build-hw1-docker.log'}, {"id": 1, "filename": 'empty.log'}],
+        })
+        self.assertEqual([part.get_filename() for part in parts[1:]], ['build-hw1-docker.log', 'empty.log'])
+        self.assertEqual([part.get_payload(decode=True) for part in parts[1:]], [file.read_bytes() for file in files])
+
+
+if __name__ == '__main__':
+    unittest.main()